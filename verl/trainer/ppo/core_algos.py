@@ -18,11 +18,28 @@ The function implemented in this file should be used by trainer with different d
 implement PPO
 """
 
+import functools
+import os
+from typing import Optional
+
 import numpy as np
 import torch
-from collections import defaultdict
 
 import verl.utils.torch_functional as verl_F
+from verl.trainer.ppo import triton_kernels
+
+
+def _maybe_compile(fn):
+    """Fuse a pointwise numeric core with torch.compile when a GPU is present.
+
+    The loss cores chain many small elementwise kernels over
+    (bs, response_length) tensors; they are memory-bound, so fusion cuts DRAM
+    traffic roughly in proportion to the number of passes. Compilation is
+    skipped on CPU-only hosts and when DISABLE_COMPILE is set.
+    """
+    if torch.cuda.is_available() and not os.environ.get('DISABLE_COMPILE'):
+        return torch.compile(fn, mode="reduce-overhead", dynamic=True)
+    return fn
 
 
 class AdaptiveKLController:
@@ -67,6 +84,24 @@ def get_kl_controller(config):
     return kl_ctrl
 
 
+@functools.lru_cache(maxsize=8)
+def _gae_powers(gen_len: int, gl: float, device: str, dtype: torch.dtype) -> torch.Tensor:
+    """(gamma*lam)^t for t in [0, gen_len); identical across minibatches, so memoized."""
+    return gl**torch.arange(gen_len, device=device, dtype=dtype)
+
+
+def _whiten_advantages(advantages: torch.Tensor, eos_mask: torch.Tensor) -> torch.Tensor:
+    """masked_whiten with a fast path for fully unpadded batches.
+
+    When the mask is all ones (common with no padding), the plain mean/std
+    reductions skip the extra masked multiply pass of `verl_F.masked_whiten`.
+    """
+    if eos_mask.all():
+        mean, std = advantages.mean(), advantages.std()
+        return (advantages - mean) / (std + 1e-8)
+    return verl_F.masked_whiten(advantages, eos_mask)
+
+
 def compute_gae_advantage_return(token_level_rewards: torch.Tensor, values: torch.Tensor, eos_mask: torch.Tensor,
                                  gamma: torch.Tensor, lam: torch.Tensor):
     """Adapted from https://github.com/huggingface/trl/blob/main/trl/trainer/ppo_trainer.py
@@ -90,21 +125,80 @@ def compute_gae_advantage_return(token_level_rewards: torch.Tensor, values: torc
             shape: (bs, response_length)
 
     """
-    with torch.no_grad():
-        lastgaelam = 0
-        advantages_reversed = []
+    # unwrap 0-dim tensors once so every op below is a tensor-by-float
+    # (scalar-broadcast fast path) instead of a tensor-by-tensor kernel
+    if torch.is_tensor(gamma):
+        gamma = gamma.item()
+    if torch.is_tensor(lam):
+        lam = lam.item()
+
+    with torch.inference_mode():
         gen_len = token_level_rewards.shape[-1]
-
-        for t in reversed(range(gen_len)):
-            nextvalues = values[:, t + 1] if t < gen_len - 1 else 0.0
-            delta = token_level_rewards[:, t] + gamma * nextvalues - values[:, t]
-            lastgaelam = delta + gamma * lam * lastgaelam
-            advantages_reversed.append(lastgaelam)
-        advantages = torch.stack(advantages_reversed[::-1], dim=1)
+        gl = gamma * lam
+
+        # closed form: A_t = sum_{k>=0} (gamma*lam)^k * delta_{t+k}, computed as a
+        # reverse discounted cumsum so the per-timestep Python loop (two kernel
+        # launches per step) collapses into a handful of vector ops
+        nextvalues = torch.cat([values[:, 1:], torch.zeros_like(values[:, :1])], dim=-1)
+        delta = token_level_rewards + gamma * nextvalues - values
+
+        if gl == 1.0:
+            advantages = delta.flip(-1).cumsum(-1).flip(-1)
+        elif gl > 0.0 and gl**(gen_len - 1) >= torch.finfo(delta.dtype).tiny:
+            powers = _gae_powers(gen_len, gl, str(delta.device), delta.dtype)
+            advantages = (delta * powers).flip(-1).cumsum(-1).flip(-1) / powers
+        else:
+            # the rescaled cumsum under/overflows for this (gamma*lam, gen_len);
+            # fall back to the sequential recurrence, written straight into a
+            # preallocated output instead of a Python list + stack copy
+            advantages = torch.empty_like(values)
+            lastgaelam = 0
+            for t in reversed(range(gen_len)):
+                lastgaelam = delta[:, t] + gl * lastgaelam
+                advantages[:, t] = lastgaelam
 
         returns = advantages + values
-        advantages = verl_F.masked_whiten(advantages, eos_mask)
-    return advantages, returns
+        advantages = _whiten_advantages(advantages, eos_mask)
+    # clone out of inference mode so downstream losses can save these for backward
+    return advantages.clone(), returns.clone()
+
+
+def _group_inverse_indices(index, device) -> torch.Tensor:
+    """Map `index` (uid per trajectory) to contiguous group ids on `device`.
+
+    `index` may be a tensor, a np object array of uid strings, or a plain list.
+    The conversion happens exactly once per call; group-wise statistics are then
+    computed with tensor ops only, so no per-element `.item()`/tensor-hashing
+    (and the host-device sync it implies) ever occurs.
+    """
+    if isinstance(index, torch.Tensor):
+        _, inverse = torch.unique(index, return_inverse=True)
+        return inverse.to(device)
+    _, inverse = np.unique(np.asarray(index), return_inverse=True)
+    return torch.as_tensor(inverse, device=device, dtype=torch.long)
+
+
+def _group_mean_std(scores: torch.Tensor, inverse: torch.Tensor):
+    """Dense per-group statistics in structure-of-arrays layout.
+
+    Returns (count, mean, std), each a contiguous Tensor[G] on scores' device
+    (G = number of groups) — never dicts keyed by uid, which would force
+    per-element dispatch. Groups with a single response get mean=0 / std=1 so
+    their raw score passes through unchanged.
+    """
+    num_groups = int(inverse.max().item()) + 1
+    count = torch.zeros(num_groups, device=scores.device,
+                        dtype=scores.dtype).scatter_add_(0, inverse, torch.ones_like(scores))
+    group_sum = torch.zeros_like(count).scatter_add_(0, inverse, scores)
+    group_sum_sq = torch.zeros_like(count).scatter_add_(0, inverse, scores * scores)
+
+    mean = group_sum / count
+    # unbiased variance, matching torch.std's default correction
+    var = (group_sum_sq - group_sum * mean) / (count - 1).clamp(min=1)
+    multi_sample = count > 1
+    mean = torch.where(multi_sample, mean, torch.zeros_like(mean))
+    std = torch.where(multi_sample, var.clamp(min=0).sqrt(), torch.ones_like(var))
+    return count, mean, std
 
 
 # NOTE(sgm): this implementation only consider outcome supervision, where the reward is a scalar.
@@ -131,52 +225,29 @@ def compute_grpo_outcome_advantage(token_level_rewards: torch.Tensor,
         Returns: `(torch.Tensor)`
             shape: (bs, response_length)
     """
-    response_length = token_level_rewards.shape[-1]
     scores = token_level_rewards.sum(dim=-1)
 
-    id2score = defaultdict(list)
-    id2mean = {}
-    id2std = {}
-
-    # import pdb; pdb.set_trace()
+    with torch.inference_mode():
+        # map `index` (uid per trajectory, usually a np object array) to contiguous group ids,
+        # so per-group statistics can be computed with dense scatter-reductions instead of
+        # Python dicts of scalar tensors
+        inverse = _group_inverse_indices(index, scores.device)
+        _, group_mean, group_std = _group_mean_std(scores, inverse)
 
-    with torch.no_grad():
-        bsz = scores.shape[0]
-        for i in range(bsz):
-            # if (rollout_ignore_mask is not None) and (rollout_ignore_mask[i].item() == True):
-            #     continue
-            id2score[index[i]].append(scores[i])
+        mean = group_mean[inverse]
+        std = group_std[inverse]
+        if norm_adv_by_std_in_grpo:
+            scores = (scores - mean) / (std + epsilon)
+        elif norm_by_importance == 'v1':
+            scores = (scores - mean) / ((scale / std) + epsilon)
+        else:
+            scores = scores - mean
 
-        # import pdb; pdb.set_trace()
+        # broadcasting: no need to materialize a (bs, response_length) copy of scores
+        scores = scores.unsqueeze(-1) * eos_mask
 
-        for idx in id2score:
-            if len(id2score[idx]) == 1:
-                id2mean[idx] = torch.tensor(0.0)
-                id2std[idx] = torch.tensor(1.0)
-            elif len(id2score[idx]) > 1:
-                id2mean[idx] = torch.mean(torch.tensor(id2score[idx]))
-                id2std[idx] = torch.std(torch.tensor([id2score[idx]]))
-            else:
-                raise ValueError(f"no score in prompt index: {idx}")
-
-        # import pdb; pdb.set_trace()
-
-        for i in range(bsz):
-            if norm_adv_by_std_in_grpo:
-                # print(f"norm_adv_by_std_in_grpo: {norm_adv_by_std_in_grpo}")
-                scores[i] = (scores[i] - id2mean[index[i]]) / (id2std[index[i]] + epsilon)
-            elif norm_by_importance == 'v1':
-                # print(f"enter, original_scale: {id2std[index[i]]}, current_scale: {scale / id2std[index[i]]}")
-                scores[i] = (scores[i] - id2mean[index[i]]) / ((scale / id2std[index[i]]) + epsilon)
-            else:
-                # print(f"norm_adv_by_std_in_grpo: {norm_adv_by_std_in_grpo}")
-                scores[i] = (scores[i] - id2mean[index[i]])
-
-        # import pdb; pdb.set_trace()
-        
-        scores = scores.unsqueeze(-1).tile([1, response_length]) * eos_mask
-
-    return scores, scores
+    # clone out of inference mode so downstream losses can save these for backward
+    return scores.clone(), scores.clone()
 
 
 def compute_rloo_outcome_advantage(token_level_rewards: torch.Tensor,
@@ -197,31 +268,23 @@ def compute_rloo_outcome_advantage(token_level_rewards: torch.Tensor,
         Returns: `(torch.Tensor)`
             shape: (bs, response_length)
     """
-    response_length = token_level_rewards.shape[-1]
     scores = token_level_rewards.sum(dim=-1)
 
-    id2score = defaultdict(list)
-    id2mean = {}
-
-    with torch.no_grad():
-        bsz = scores.shape[0]
-        for i in range(bsz):
-            id2score[index[i]].append(scores[i])
-        for idx in id2score:
-            if len(id2score[idx]) == 1:
-                id2mean[idx] = torch.tensor(0.0)
-            elif len(id2score[idx]) > 1:
-                id2mean[idx] = torch.mean(torch.tensor(id2score[idx]))
-            else:
-                raise ValueError(f"no score in prompt index: {idx}")
-        for i in range(bsz):
-            response_num = len(id2score[index[i]])
-            if response_num > 1:
-                scores[i] = scores[i] * response_num / (response_num -
-                                                        1) - id2mean[index[i]] * response_num / (response_num - 1)
-        scores = scores.unsqueeze(-1).tile([1, response_length]) * eos_mask
-
-    return scores, scores
+    with torch.inference_mode():
+        # same scatter-reduction scheme as compute_grpo_outcome_advantage
+        inverse = _group_inverse_indices(index, scores.device)
+        count, group_mean, _ = _group_mean_std(scores, inverse)
+
+        response_num = count[inverse]
+        mean = group_mean[inverse]
+        # leave-one-out baseline; groups with a single response keep their raw score
+        factor = response_num / (response_num - 1).clamp(min=1)
+        scores = torch.where(response_num > 1, scores * factor - mean * factor, scores)
+        # broadcasting: no need to materialize a (bs, response_length) copy of scores
+        scores = scores.unsqueeze(-1) * eos_mask
+
+    # clone out of inference mode so downstream losses can save these for backward
+    return scores.clone(), scores.clone()
 
 
 def compute_reinforce_plus_plus_outcome_advantage(token_level_rewards: torch.Tensor, eos_mask: torch.Tensor,
@@ -242,20 +305,28 @@ def compute_reinforce_plus_plus_outcome_advantage(token_level_rewards: torch.Ten
             shape: (bs, response_length)
     """
 
-    with torch.no_grad():
-        returns = torch.zeros_like(token_level_rewards)
-        running_return = 0
+    if torch.is_tensor(gamma):
+        gamma = gamma.item()
+
+    with torch.inference_mode():
+        if triton_kernels.reinforce_pp_returns_available(token_level_rewards):
+            # fuse the reverse masked scan into a single kernel launch
+            returns = triton_kernels.reinforce_pp_returns(token_level_rewards, eos_mask, gamma)
+        else:
+            returns = torch.zeros_like(token_level_rewards)
+            running_return = 0
 
-        for t in reversed(range(token_level_rewards.shape[1])):
-            running_return = token_level_rewards[:, t] + gamma * running_return
-            returns[:, t] = running_return
-            # Reset after EOS
-            running_return = running_return * eos_mask[:, t]
+            for t in reversed(range(token_level_rewards.shape[1])):
+                running_return = token_level_rewards[:, t] + gamma * running_return
+                returns[:, t] = running_return
+                # Reset after EOS
+                running_return = running_return * eos_mask[:, t]
 
-        advantages = verl_F.masked_whiten(returns, eos_mask)
+        advantages = _whiten_advantages(returns, eos_mask)
         advantages = advantages * eos_mask
 
-    return advantages, returns
+    # clone out of inference mode so downstream losses can save these for backward
+    return advantages.clone(), returns.clone()
 
 
 def compute_remax_outcome_advantage(token_level_rewards: torch.Tensor, reward_baselines: torch.Tensor,
@@ -279,14 +350,17 @@ def compute_remax_outcome_advantage(token_level_rewards: torch.Tensor, reward_ba
         Returns: `(torch.Tensor)`
             shape: (bs, response_length)
     """
-    response_length = token_level_rewards.shape[-1]
     scores = token_level_rewards.sum(dim=-1)
 
-    with torch.no_grad():
-        returns = (token_level_rewards * eos_mask).flip(dims=[-1]).cumsum(dim=-1).flip(dims=[-1])
-        advantages = returns - reward_baselines.unsqueeze(-1).tile([1, response_length]) * eos_mask
+    with torch.inference_mode():
+        masked_rewards = token_level_rewards * eos_mask
+        # reverse cumsum via the suffix-sum identity: total - cumsum + x writes the
+        # tensor one fewer time than flip/cumsum/flip
+        returns = masked_rewards.sum(dim=-1, keepdim=True) - masked_rewards.cumsum(dim=-1) + masked_rewards
+        advantages = returns - reward_baselines.unsqueeze(-1) * eos_mask
 
-    return advantages, returns
+    # clone out of inference mode so downstream losses can save these for backward
+    return advantages.clone(), returns.clone()
 
 
 def compute_rewards(token_level_scores, old_log_prob, ref_log_prob, kl_ratio):
@@ -294,7 +368,63 @@ def compute_rewards(token_level_scores, old_log_prob, ref_log_prob, kl_ratio):
     return token_level_scores - kl * kl_ratio
 
 
-def agg_loss(loss_mat: torch.Tensor, loss_mask: torch.Tensor, loss_agg_mode: str, scale = 1.0, eps = 1e-6):
+@torch.jit.script
+def _agg_token_mean(loss_mat: torch.Tensor, loss_mask: torch.Tensor, scale: float, eps: float,
+                    mask_sum: Optional[torch.Tensor]) -> torch.Tensor:
+    if mask_sum is not None:
+        denom = mask_sum.sum()
+    else:
+        denom = torch.sum(loss_mask, dtype=torch.float32)
+    return torch.sum(loss_mat * loss_mask, dtype=torch.float32) / (denom + eps)
+
+
+@torch.jit.script
+def _agg_seq_mean_token_sum(loss_mat: torch.Tensor, loss_mask: torch.Tensor, scale: float, eps: float,
+                            mask_sum: Optional[torch.Tensor]) -> torch.Tensor:
+    seq_losses = torch.sum(loss_mat * loss_mask, dim=-1, dtype=torch.float32)  # token-sum
+    return torch.mean(seq_losses)  # seq-mean
+
+
+@torch.jit.script
+def _agg_seq_mean_token_mean(loss_mat: torch.Tensor, loss_mask: torch.Tensor, scale: float, eps: float,
+                             mask_sum: Optional[torch.Tensor]) -> torch.Tensor:
+    if mask_sum is None:
+        mask_sum = torch.sum(loss_mask, dim=-1)
+    seq_losses = torch.sum(loss_mat * loss_mask, dim=-1, dtype=torch.float32) / (mask_sum + eps)  # token-mean
+    return torch.mean(seq_losses)  # seq-mean
+
+
+# (loss_mask.shape[-1]) should ideally be constant
+# throughout training to well-replicate the DrGRPO paper.
+# TODO: Perhaps add user-defined normalizer argument to
+# agg_loss to ensure divisor stays constant throughout.
+@torch.jit.script
+def _agg_seq_mean_token_sum_norm(loss_mat: torch.Tensor, loss_mask: torch.Tensor, scale: float, eps: float,
+                                 mask_sum: Optional[torch.Tensor]) -> torch.Tensor:
+    seq_losses = torch.sum(loss_mat * loss_mask, dim=-1, dtype=torch.float32) / loss_mask.size(-1)
+    return torch.mean(seq_losses)  # seq-mean
+
+
+@torch.jit.script
+def _agg_seq_mean_token_sum_norm_scaled(loss_mat: torch.Tensor, loss_mask: torch.Tensor, scale: float, eps: float,
+                                        mask_sum: Optional[torch.Tensor]) -> torch.Tensor:
+    seq_losses = (torch.sum(loss_mat * loss_mask, dim=-1, dtype=torch.float32) / loss_mask.size(-1)) * scale
+    return torch.mean(seq_losses)  # seq-mean
+
+
+# scripted once at import so each aggregation mode is a single fused program;
+# resolved by dict lookup instead of a string if-chain per minibatch
+_AGG_FUNCS = {
+    "token-mean": _agg_token_mean,
+    "seq-mean-token-sum": _agg_seq_mean_token_sum,
+    "seq-mean-token-mean": _agg_seq_mean_token_mean,
+    "seq-mean-token-sum-norm": _agg_seq_mean_token_sum_norm,
+    "seq-mean-token-sum-norm-scaled": _agg_seq_mean_token_sum_norm_scaled,
+}
+
+
+def agg_loss(loss_mat: torch.Tensor, loss_mask: torch.Tensor, loss_agg_mode: str, scale = 1.0, eps = 1e-6,
+             mask_sum: torch.Tensor = None):
     """
     Aggregate the loss matrix into a scalar.
 
@@ -305,49 +435,38 @@ def agg_loss(loss_mat: torch.Tensor, loss_mask: torch.Tensor, loss_agg_mode: str
             shape: (bs, response_length)
         loss_agg_mode: (str) choices:
             method to aggregate the loss matrix into a scalar.
+        mask_sum: `(torch.Tensor)`, optional:
+            shape: (bs,). Precomputed per-sequence sum of `loss_mask`; when
+            provided, the internal mask reductions are skipped.
     Returns:
         loss: `a scalar torch.Tensor`
             aggregated loss
     """
-    if loss_agg_mode == "token-mean":
-        # print("e1")
-        loss = verl_F.masked_mean(loss_mat, loss_mask)
-    elif loss_agg_mode == "seq-mean-token-sum":
-        seq_losses = torch.sum(loss_mat * loss_mask, dim=-1)  # token-sum
-        loss = torch.mean(seq_losses)  # seq-mean
-    elif loss_agg_mode == "seq-mean-token-mean":
-        seq_losses = torch.sum(loss_mat * loss_mask, dim=-1) / (torch.sum(loss_mask, dim=-1) + eps)  # token-mean
-        loss = torch.mean(seq_losses)  # seq-mean
-    elif loss_agg_mode == "seq-mean-token-sum-norm":
-        # print(f"e2 loss_mask.shape: {loss_mask.shape}")
-        # seq_losses = torch.sum(loss_mat * loss_mask, dim=-1)
-        # loss = torch.sum(seq_losses) / loss_mask.shape[-1]  # The divisor
-
-        seq_losses = torch.sum(loss_mat * loss_mask, dim=-1) / loss_mask.shape[-1]
-        loss = torch.mean(seq_losses)  # seq-mean
-
-        # (loss_mask.shape[-1]) should ideally be constant
-        # throughout training to well-replicate the DrGRPO paper.
-        # TODO: Perhaps add user-defined normalizer argument to
-        # agg_loss to ensure divisor stays constant throughout.
-    elif loss_agg_mode == "seq-mean-token-sum-norm-scaled":
-        # print(f"e2 loss_mask.shape: {loss_mask.shape}")
-        # seq_losses = torch.sum(loss_mat * loss_mask, dim=-1)
-        # loss = torch.sum(seq_losses) / loss_mask.shape[-1]  # The divisor
-
-        # print(f"enter scale: {scale}")
-
-        seq_losses = (torch.sum(loss_mat * loss_mask, dim=-1) / loss_mask.shape[-1]) * scale
-        loss = torch.mean(seq_losses)  # seq-mean
-
-        # (loss_mask.shape[-1]) should ideally be constant
-        # throughout training to well-replicate the DrGRPO paper.
-        # TODO: Perhaps add user-defined normalizer argument to
-        # agg_loss to ensure divisor stays constant throughout.
-    else:
+    agg_fn = _AGG_FUNCS.get(loss_agg_mode)
+    if agg_fn is None:
         raise ValueError(f"Invalid loss_agg_mode: {loss_agg_mode}")
+    loss = agg_fn(loss_mat, loss_mask, float(scale), float(eps), mask_sum)
 
-    return loss
+    # accumulate in FP32 (free accuracy on BF16 losses), hand back the input dtype
+    return loss.to(loss_mat.dtype)
+
+
+@_maybe_compile
+def _gspo_loss_core(old_log_prob, log_prob, advantages, response_mask, cliprange_low: float,
+                    cliprange_high: float, eps: float):
+    """Pointwise/reduction core of the GSPO objective, kept pure for fusion."""
+    # compute sequence-level importance ratio
+    seq_lengths = torch.sum(response_mask, dim=-1, dtype=torch.float32)
+    normalized_seq_log_prob = torch.sum(log_prob * response_mask, dim=-1, dtype=torch.float32) / (seq_lengths + eps)
+    normalized_old_seq_log_prob = torch.sum(old_log_prob * response_mask, dim=-1, dtype=torch.float32) / (seq_lengths + eps)
+    negative_approx_kl_seq = normalized_seq_log_prob - normalized_old_seq_log_prob
+    seq_ratio = torch.exp(negative_approx_kl_seq)
+
+    pg_losses1 = -advantages * seq_ratio
+    pg_losses2 = -advantages * torch.clamp(seq_ratio, 1 - cliprange_low, 1 + cliprange_high)
+    pg_losses = torch.maximum(pg_losses1, pg_losses2)
+    clip_indicator = torch.gt(pg_losses2, pg_losses1).float()
+    return pg_losses, clip_indicator, negative_approx_kl_seq, seq_lengths
 
 
 def compute_policy_loss_gspo(
@@ -381,29 +500,82 @@ def compute_policy_loss_gspo(
         cliprange_low = cliprange
     if cliprange_high is None:
         cliprange_high = cliprange
-
-    # compute sequence-level importance ratio
-    seq_lengths = torch.sum(response_mask, dim=-1)
-    normalized_seq_log_prob = torch.sum(log_prob * response_mask, dim=-1) / (seq_lengths + eps)
-    normalized_old_seq_log_prob = torch.sum(old_log_prob * response_mask, dim=-1) / (seq_lengths + eps)
-    negative_approx_kl_seq = normalized_seq_log_prob - normalized_old_seq_log_prob
-    seq_ratio = torch.exp(negative_approx_kl_seq)
-
-    pg_losses1 = -advantages * seq_ratio
-    pg_losses2 = -advantages * torch.clamp(seq_ratio, 1 - cliprange_low, 1 + cliprange_high)
-    pg_losses = torch.maximum(pg_losses1, pg_losses2)
-    pg_loss = agg_loss(loss_mat=pg_losses, loss_mask=response_mask, loss_agg_mode=loss_agg_mode)
-    
+    if torch.is_tensor(cliprange_low):
+        cliprange_low = cliprange_low.item()
+    if torch.is_tensor(cliprange_high):
+        cliprange_high = cliprange_high.item()
+
+    pg_losses, clip_indicator, negative_approx_kl_seq, seq_lengths = _gspo_loss_core(old_log_prob, log_prob,
+                                                                                     advantages, response_mask,
+                                                                                     cliprange_low, cliprange_high,
+                                                                                     eps)
+    # the sequence-level KL is already in memory; report its mean as the metric
+    # instead of recomputing (and clamping) the full token-level map for logging
+    ppo_kl = (-negative_approx_kl_seq).mean()
+
+    # one traversal for the loss/clipfrac sums plus the mask count, then divide
+    loss_sum, clip_count, mask_count = _reduce_clip(pg_losses, clip_indicator, response_mask)
     # For compatibility, return zero for pg_clipfrac_lower (not used in standard GSPO)
-    pg_clipfrac = verl_F.masked_mean(torch.gt(pg_losses2, pg_losses1).float(), response_mask)
+    pg_clipfrac = clip_count / (mask_count + 1e-6)
     # pg_clipfrac_lower = torch.tensor(0.0, device=pg_loss.device)
+    if loss_agg_mode == 'token-mean':
+        pg_loss = loss_sum / (mask_count + 1e-6)
+    else:
+        # reuse the per-sequence mask sums already computed for the seq ratio
+        pg_loss = agg_loss(loss_mat=pg_losses, loss_mask=response_mask, loss_agg_mode=loss_agg_mode,
+                           mask_sum=seq_lengths)
+
+    return pg_loss, pg_clipfrac, ppo_kl
+
+
+@_maybe_compile
+def _reduce_ppo(losses, negative_approx_kl, clip_indicator, mask):
+    """Single-pass masked reduction over the (bs, response_length) loss tensors.
 
-    # compute token-level mean kl divergence metric for compatibility
+    Returns stacked [loss_sum, kl_sum, clip_count, mask_count] so callers can
+    derive the three masked means with host-side divisions instead of three
+    separate passes over the mask.
+    """
+    stacked = torch.stack(
+        [losses * mask, -negative_approx_kl * mask, clip_indicator * mask,
+         mask.to(losses.dtype)])
+    return stacked.sum(dim=(1, 2))
+
+
+@_maybe_compile
+def _reduce_clip(losses, clip_indicator, mask):
+    """As `_reduce_ppo`, without a KL term (GSPO logs the sequence-level KL)."""
+    stacked = torch.stack([losses * mask, clip_indicator * mask, mask.to(losses.dtype)])
+    return stacked.sum(dim=(1, 2))
+
+
+@torch.jit.script
+def _ratio_kl(log_prob: torch.Tensor, old_log_prob: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+    """Fused importance ratio and approximate KL: one read of both logprob tensors."""
     negative_approx_kl = log_prob - old_log_prob
-    negative_approx_kl = torch.clamp(negative_approx_kl, min=-20.0, max=20.0)
-    ppo_kl = verl_F.masked_mean(-negative_approx_kl, response_mask)
+    return torch.exp(negative_approx_kl), negative_approx_kl
 
-    return pg_loss, pg_clipfrac, ppo_kl
+
+def _clip_max(losses1, losses2):
+    """max(losses1, losses2) and the clip indicator from a single comparison.
+
+    torch.max followed by torch.gt compares the operands twice; reusing the
+    boolean for both outputs halves the reads over the (bs, response_length)
+    loss tensors.
+    """
+    gt = losses2 > losses1
+    return torch.where(gt, losses2, losses1), gt.to(losses1.dtype)
+
+
+@_maybe_compile
+def _policy_loss_core(old_log_prob, log_prob, advantages, cliprange_low: float, cliprange_high: float):
+    """Pointwise core of the clipped PPO objective, kept pure for fusion."""
+    ratio, negative_approx_kl = _ratio_kl(log_prob, old_log_prob)
+
+    pg_losses = -advantages * ratio
+    pg_losses2 = -advantages * torch.clamp(ratio, 1.0 - cliprange_low, 1.0 + cliprange_high)  # - clip(ratio, 1-cliprange, 1+cliprange) * A
+    clipped_losses, clip_indicator = _clip_max(pg_losses, pg_losses2)
+    return clipped_losses, clip_indicator, negative_approx_kl
 
 
 def compute_policy_loss(old_log_prob,
@@ -440,26 +612,96 @@ def compute_policy_loss(old_log_prob,
         ppo_kl: (float)
             the estimated KL divergence between the latest updating policy and the old sampling policy
     """
-    negative_approx_kl = log_prob - old_log_prob
-    ratio = torch.exp(negative_approx_kl)
-    ppo_kl = verl_F.masked_mean(-negative_approx_kl, eos_mask)
-
-    pg_losses = -advantages * ratio
-    # pg_losses2 = -advantages * torch.clamp(ratio, 1.0 - cliprange, 1.0 + cliprange)
     if cliprange_low is None:
         cliprange_low = cliprange
     if cliprange_high is None:
         cliprange_high = cliprange
-    pg_losses2 = -advantages * torch.clamp(ratio, 1.0 - cliprange_low, 1.0 + cliprange_high)  # - clip(ratio, 1-cliprange, 1+cliprange) * A
-    
-    # print("ratio.shape: ", ratio.shape, "eos_mask.shape: ", eos_mask.shape)
-
-    # pg_loss = verl_F.masked_mean(torch.max(pg_losses, pg_losses2), eos_mask)
-    pg_loss = agg_loss(loss_mat=torch.max(pg_losses, pg_losses2), loss_mask=eos_mask, loss_agg_mode=loss_agg_mode, scale=scale)
-    pg_clipfrac = verl_F.masked_mean(torch.gt(pg_losses2, pg_losses).float(), eos_mask)
+    if torch.is_tensor(cliprange_low):
+        cliprange_low = cliprange_low.item()
+    if torch.is_tensor(cliprange_high):
+        cliprange_high = cliprange_high.item()
+
+    clipped_losses, clip_indicator, negative_approx_kl = _policy_loss_core(old_log_prob, log_prob, advantages,
+                                                                           cliprange_low, cliprange_high)
+    # one traversal for loss/kl/clipfrac sums plus the mask count, then divide
+    loss_sum, kl_sum, clip_count, mask_count = _reduce_ppo(clipped_losses, negative_approx_kl, clip_indicator,
+                                                           eos_mask)
+    ppo_kl = kl_sum / (mask_count + 1e-6)
+    pg_clipfrac = clip_count / (mask_count + 1e-6)
+    if loss_agg_mode == 'token-mean':
+        pg_loss = loss_sum / (mask_count + 1e-6)
+    else:
+        pg_loss = agg_loss(loss_mat=clipped_losses, loss_mask=eos_mask, loss_agg_mode=loss_agg_mode, scale=scale)
     return pg_loss, pg_clipfrac, ppo_kl
 
 
+class PolicyLossGraph:
+    """CUDA-graph capture of the PPO policy loss for fixed shapes.
+
+    With padded batches, (bs, response_length) stays constant within a training
+    step, so the launch-bound elementwise sequence in `compute_policy_loss` can
+    be captured once per shape and replayed, removing per-kernel launch
+    overhead without the Dynamo warm-up cost of `torch.compile`. Graphs (with
+    their backward) are built through `torch.cuda.make_graphed_callables` and
+    cached keyed on the input shape.
+
+    Opt-in with USE_CUDA_GRAPH_LOSS=1; on CPU tensors or when disabled every
+    call falls through to the eager `compute_policy_loss`.
+    """
+
+    def __init__(self, cliprange=None, cliprange_low=None, cliprange_high=None, loss_agg_mode='token-mean',
+                 scale=1.0):
+        if cliprange_low is None:
+            cliprange_low = cliprange
+        if cliprange_high is None:
+            cliprange_high = cliprange
+        self.cliprange_low = float(cliprange_low)
+        self.cliprange_high = float(cliprange_high)
+        self.loss_agg_mode = loss_agg_mode
+        self.scale = scale
+        self._graphed = {}
+
+    def _enabled(self, log_prob) -> bool:
+        return (torch.cuda.is_available() and log_prob.is_cuda and os.environ.get('USE_CUDA_GRAPH_LOSS') == '1')
+
+    def _loss(self, old_log_prob, log_prob, advantages, eos_mask):
+        # eager twin of compute_policy_loss: graph capture cannot nest inside
+        # the torch.compile'd cores (reduce-overhead already uses CUDA graphs)
+        ratio, negative_approx_kl = _ratio_kl(log_prob, old_log_prob)
+        pg_losses = -advantages * ratio
+        pg_losses2 = -advantages * torch.clamp(ratio, 1.0 - self.cliprange_low, 1.0 + self.cliprange_high)
+        clipped_losses, clip_indicator = _clip_max(pg_losses, pg_losses2)
+        mask_count = eos_mask.sum()
+        ppo_kl = torch.sum(-negative_approx_kl * eos_mask) / (mask_count + 1e-6)
+        pg_clipfrac = torch.sum(clip_indicator * eos_mask) / (mask_count + 1e-6)
+        if self.loss_agg_mode == 'token-mean':
+            pg_loss = torch.sum(clipped_losses * eos_mask) / (mask_count + 1e-6)
+        else:
+            pg_loss = agg_loss(loss_mat=clipped_losses, loss_mask=eos_mask, loss_agg_mode=self.loss_agg_mode,
+                               scale=self.scale)
+        return pg_loss, pg_clipfrac, ppo_kl
+
+    def __call__(self, old_log_prob, log_prob, advantages, eos_mask):
+        if not self._enabled(log_prob):
+            return compute_policy_loss(old_log_prob,
+                                       log_prob,
+                                       advantages,
+                                       eos_mask,
+                                       cliprange_low=self.cliprange_low,
+                                       cliprange_high=self.cliprange_high,
+                                       loss_agg_mode=self.loss_agg_mode,
+                                       scale=self.scale)
+        key = tuple(log_prob.shape)
+        graphed = self._graphed.get(key)
+        if graphed is None:
+            sample_args = (old_log_prob.detach().clone(),
+                           log_prob.detach().clone().requires_grad_(log_prob.requires_grad),
+                           advantages.detach().clone(), eos_mask.detach().clone())
+            graphed = torch.cuda.make_graphed_callables(self._loss, sample_args)
+            self._graphed[key] = graphed
+        return graphed(old_log_prob, log_prob, advantages, eos_mask)
+
+
 def compute_entropy_loss(logits, eos_mask):
     """Compute Categorical entropy loss
 
@@ -479,6 +721,16 @@ def compute_entropy_loss(logits, eos_mask):
     return entropy_loss
 
 
+@_maybe_compile
+def _value_loss_core(vpreds, returns, values, cliprange_value: float):
+    """Pointwise core of the clipped value objective, kept pure for fusion."""
+    vpredclipped = verl_F.clip_by_value(vpreds, values - cliprange_value, values + cliprange_value)
+    vf_losses1 = (vpreds - returns)**2
+    vf_losses2 = (vpredclipped - returns)**2
+    clipped_losses, clip_indicator = _clip_max(vf_losses1, vf_losses2)
+    return clipped_losses, clip_indicator
+
+
 def compute_value_loss(vpreds, returns, values, eos_mask, cliprange_value):
     """Compute the value loss. Copied from https://github.com/huggingface/trl/blob/main/trl/trainer/ppo_trainer.py#L1151
 
@@ -497,14 +749,49 @@ def compute_value_loss(vpreds, returns, values, eos_mask, cliprange_value):
             The ratio of vf being clipped
 
     """
-    vpredclipped = verl_F.clip_by_value(vpreds, values - cliprange_value, values + cliprange_value)
-    vf_losses1 = (vpreds - returns)**2
-    vf_losses2 = (vpredclipped - returns)**2
-    vf_loss = 0.5 * verl_F.masked_mean(torch.max(vf_losses1, vf_losses2), eos_mask)
-    vf_clipfrac = verl_F.masked_mean(torch.gt(vf_losses2, vf_losses1).float(), eos_mask)
+    if torch.is_tensor(cliprange_value):
+        cliprange_value = cliprange_value.item()
+    clipped_losses, clip_indicator = _value_loss_core(vpreds, returns, values, cliprange_value)
+    vf_loss = 0.5 * verl_F.masked_mean(clipped_losses, eos_mask)
+    vf_clipfrac = verl_F.masked_mean(clip_indicator, eos_mask)
     return vf_loss, vf_clipfrac
 
 
+@torch.jit.script
+def _kl(logprob: torch.Tensor, ref_logprob: torch.Tensor) -> torch.Tensor:
+    return logprob - ref_logprob
+
+
+@torch.jit.script
+def _abs_kl(logprob: torch.Tensor, ref_logprob: torch.Tensor) -> torch.Tensor:
+    return (logprob - ref_logprob).abs()
+
+
+@torch.jit.script
+def _mse_kl(logprob: torch.Tensor, ref_logprob: torch.Tensor) -> torch.Tensor:
+    return 0.5 * (logprob - ref_logprob).square()
+
+
+# J. Schulman. Approximating kl divergence, 2020.
+# URL http://joschu.net/blog/kl-approx.html.
+@torch.jit.script
+def _low_var_kl(logprob: torch.Tensor, ref_logprob: torch.Tensor) -> torch.Tensor:
+    kl = ref_logprob - logprob
+    ratio = torch.exp(kl)
+    kld = ratio - kl - 1
+    return torch.clamp(kld, min=-10.0, max=10.0)
+
+
+# scripted once at import so TorchScript can fuse each branch; resolved by dict
+# lookup instead of an if-chain per minibatch
+_KL_FUNCS = {
+    "kl": _kl,
+    "abs": _abs_kl,
+    "mse": _mse_kl,
+    "low_var_kl": _low_var_kl,
+}
+
+
 def kl_penalty(logprob: torch.FloatTensor, ref_logprob: torch.FloatTensor, kl_penalty) -> torch.FloatTensor:
     """Compute KL divergence given logprob and ref_logprob.
     Copied from https://github.com/huggingface/trl/blob/main/trl/trainer/ppo_trainer.py#L1104
@@ -516,25 +803,9 @@ def kl_penalty(logprob: torch.FloatTensor, ref_logprob: torch.FloatTensor, kl_pe
     Returns:
 
     """
-    if kl_penalty == "kl":
-        return logprob - ref_logprob
-
-    if kl_penalty == "abs":
-        return (logprob - ref_logprob).abs()
-
-    if kl_penalty == "mse":
-        return 0.5 * (logprob - ref_logprob).square()
-
-    # J. Schulman. Approximating kl divergence, 2020.
-    # # URL http://joschu.net/blog/kl-approx.html.
-    if kl_penalty == 'low_var_kl':
-        kl = ref_logprob - logprob
-        ratio = torch.exp(kl)
-        kld = (ratio - kl - 1).contiguous()
-        return torch.clamp(kld, min=-10, max=10)
-
-    if kl_penalty == "full":
-        # so, here logprob and ref_logprob should contain the logits for every token in vocabulary
-        raise NotImplementedError
+    kl_fn = _KL_FUNCS.get(kl_penalty)
+    if kl_fn is not None:
+        return kl_fn(logprob, ref_logprob)
 
+    # "full" would require the logits for every token in vocabulary
     raise NotImplementedError
@@ -0,0 +1,79 @@
+# Copyright 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Optional Triton kernels for launch-bound scans in core_algos.
+
+The REINFORCE++ discounted-return recurrence resets the running return at EOS
+positions, which prevents a closed-form cumsum rewrite; the Python loop instead
+launches two small CUDA kernels per timestep. The kernel below fuses the whole
+reverse masked scan into a single launch (one program per batch row).
+
+Enabled with USE_TRITON_GAE=1; callers must keep a PyTorch fallback.
+"""
+
+import os
+
+import torch
+
+try:
+    import triton
+    import triton.language as tl
+    TRITON_AVAILABLE = True
+except ImportError:
+    TRITON_AVAILABLE = False
+
+if TRITON_AVAILABLE:
+
+    @triton.jit
+    def _rpp_return_kernel(rewards_ptr, mask_ptr, out_ptr, T, gamma, stride_b, stride_t):
+        b = tl.program_id(0)
+        running = 0.0
+        for i in range(T):
+            t = T - 1 - i
+            offset = b * stride_b + t * stride_t
+            reward = tl.load(rewards_ptr + offset)
+            running = reward + gamma * running
+            tl.store(out_ptr + offset, running)
+            # reset after EOS
+            running = running * tl.load(mask_ptr + offset)
+
+
+def reinforce_pp_returns_available(token_level_rewards: torch.Tensor) -> bool:
+    """Whether the Triton reverse masked scan can (and should) be used."""
+    return (TRITON_AVAILABLE and os.environ.get('USE_TRITON_GAE') == '1' and token_level_rewards.is_cuda)
+
+
+def reinforce_pp_returns(token_level_rewards: torch.Tensor, eos_mask: torch.Tensor,
+                         gamma: float) -> torch.Tensor:
+    """Compute REINFORCE++ discounted returns with a single fused kernel launch.
+
+    Args:
+        token_level_rewards: `(torch.Tensor)`
+            shape: (bs, response_length)
+        eos_mask: `(torch.Tensor)`
+            shape: (bs, response_length)
+        gamma: `(float)`
+            discounted factor used in RL
+
+    Returns:
+        returns: `(torch.Tensor)`
+            shape: (bs, response_length)
+    """
+    rewards = token_level_rewards.contiguous()
+    mask = eos_mask.to(rewards.dtype).contiguous()
+    returns = torch.empty_like(rewards)
+    bsz, gen_len = rewards.shape
+    _rpp_return_kernel[(bsz,)](rewards, mask, returns, gen_len, float(gamma), rewards.stride(0),
+                               rewards.stride(1))
+    return returns
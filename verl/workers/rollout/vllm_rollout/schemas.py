@@ -99,6 +99,24 @@ class AsyncRolloutRequest:
         self.attention_mask=attention_mask
         self.position_ids=position_ids
 
+    def shallow_fork(self) -> "AsyncRolloutRequest":
+        """Cheap per-rollout copy that shares read-only payloads.
+
+        The rollout loop only mutates `raw_prompt_id` (token ids grow each
+        turn) and the `multi_modal_data` image list, so those containers are
+        forked; everything else -- the original image, raw prompt, input
+        tensors and scalar fields -- stays shared by reference. This replaces
+        a deepcopy that recursively duplicated PIL image buffers per request.
+        """
+        new = object.__new__(AsyncRolloutRequest)
+        new.__dict__.update(self.__dict__)
+        new.raw_prompt_id = list(self.raw_prompt_id)
+        if self.multi_modal_data:
+            new.multi_modal_data = dict(self.multi_modal_data)
+            if 'image' in new.multi_modal_data:
+                new.multi_modal_data['image'] = list(new.multi_modal_data['image'])
+        return new
+
 '''
 class AsyncRolloutRequest:
     """The data model for async rollout."""
@@ -1,11 +1,14 @@
 import os
 import re
+import math
 import time
 import io
 import asyncio
 import logging
 import json
+import functools
 from collections.abc import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from copy import deepcopy
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
@@ -35,6 +38,7 @@ from verl.workers.rollout.vllm_rollout.schemas import (
 )
 from verl.workers.rollout.vllm_rollout.vllm_rollout import _pre_process_inputs
 from vllm import SamplingParams
+from vllm.sampling_params import RequestOutputKind
 from vllm.engine.arg_utils import AsyncEngineArgs
 from vllm.entrypoints.logger import RequestLogger
 from vllm.entrypoints.openai.protocol import (
@@ -53,6 +57,24 @@ from verl.trainer.constants import ERROR_INFO_MULTI_TURN_PROMPT, TOOL_CALL_CROP_
 from .function_tools import prepare_grounding_inputs_multi_turn, crop_image, get_valid_mask
 from PIL import Image
 
+# compiled once at import; _async_rollout_a_request runs per rollout and
+# per turn, so per-call re.compile / re.match cache lookups add up
+_GROUNDING_SPAN_RE = re.compile(r'<grounding>(.*?)</grounding>', re.DOTALL)
+_GROUNDING_CALL_RE = re.compile(".*<grounding>{\"bbox_2d\": (.*),.*\"source\": [\',\"](.*)[\',\"]}</grounding>",
+                                re.DOTALL)
+
+# actor name -> handle, so engine reinitialization skips repeat GCS queries
+_ACTOR_HANDLE_CACHE: Dict[str, Any] = {}
+
+
+def _lookup_actor(actor_name: str):
+    handle = _ACTOR_HANDLE_CACHE.get(actor_name)
+    if handle is None:
+        handle = ray.get_actor(actor_name)
+        _ACTOR_HANDLE_CACHE[actor_name] = handle
+    return handle
+
+
 def _get_model_runner_workers(vllm_config, init_ray: bool = True):
     assert vllm_config.instance_id is not None, "instance_id must be set for external ray actors."
     fields = vllm_config.instance_id.split(":")
@@ -81,17 +103,23 @@ def _get_model_runner_workers(vllm_config, init_ray: bool = True):
     # sort actor names by pg_index and local_rank
     actor_names = sorted(actor_names, key=get_pg_index_and_local_rank)
     actor_names = actor_names[vllm_dp_rank * vllm_tp_size : (vllm_dp_rank + 1) * vllm_tp_size]
-    workers: List[WorkerWrapperBase] = [ray.get_actor(actor_name) for actor_name in actor_names]
+    # each ray.get_actor is a blocking GCS round-trip that releases the GIL;
+    # resolve the fleet concurrently instead of serially
+    with ThreadPoolExecutor(max_workers=min(32, max(len(actor_names), 1))) as pool:
+        workers: List[WorkerWrapperBase] = list(pool.map(_lookup_actor, actor_names))
     print(f"instance_id: {vllm_config.instance_id} initializes with external actors: {actor_names}")
     return workers
 
 def pad_to_max_stack(tensor_list: List[torch.Tensor], pad_token_id: int, dim: int) -> torch.Tensor:
     assert all([t.ndim == 1 for t in tensor_list])
     max_len = max([t.size(0) for t in tensor_list])
-    padded_tensor_list = []
-    for t in tensor_list:
-        padded_tensor_list.append(torch.cat([t,torch.tensor([pad_token_id] * (max_len-t.size(0)), device=t.device, dtype=t.dtype)],dim=0))
-    return torch.stack(padded_tensor_list, dim=dim)
+    # one contiguous allocation + one strided copy per row, instead of a fresh
+    # pad tensor, cat and stack copy for every row
+    out = torch.full((len(tensor_list), max_len), pad_token_id, dtype=tensor_list[0].dtype,
+                     device=tensor_list[0].device)
+    for i, t in enumerate(tensor_list):
+        out[i, :t.size(0)].copy_(t)
+    return out if dim == 0 else out.transpose(0, dim).contiguous()
 
 class ExternalRayDistributedExecutor(Executor):
     """An executor that engines are launched by external ray actors."""
@@ -109,18 +137,23 @@ class ExternalRayDistributedExecutor(Executor):
             distributed_init_method="env://",
             is_driver_worker=True,
         )
-        self.collective_rpc("init_worker", args=([kwargs],))
-        self.collective_rpc("init_device")
-        self.collective_rpc("load_model")
+        # each actor executes its tasks in submission order, so the three init
+        # RPCs can be dispatched back-to-back and synced with one ray.get
+        # instead of three serial round-trips
+        refs = self.collective_rpc_async("init_worker", args=([kwargs],))
+        refs += self.collective_rpc_async("init_device")
+        refs += self.collective_rpc_async("load_model")
+        ray.get(refs)
         print(f"instance_id: {self.vllm_config.instance_id} intializes finished.")
 
-    def collective_rpc(
+    def collective_rpc_async(
         self,
         method: Union[str, Callable],
         timeout: Optional[float] = None,
         args: Tuple = (),
         kwargs: Optional[Dict[str, Any]] = None,
-    ) -> List[Any]:
+    ) -> List[ray.ObjectRef]:
+        """Dispatch the RPC to every worker without blocking; returns ObjectRefs."""
         # TODO(wuxibin): support ray compiled graph
         if isinstance(method, str):
             sent_method = method
@@ -128,14 +161,44 @@ class ExternalRayDistributedExecutor(Executor):
             sent_method = cloudpickle.dumps(method)
         del method
 
-        outputs = ray.get(
-            [worker.execute_method.remote(sent_method, *args, **(kwargs or {})) for worker in self.workers]
-        )
-        return outputs
+        return [worker.execute_method.remote(sent_method, *args, **(kwargs or {})) for worker in self.workers]
+
+    def collective_rpc(
+        self,
+        method: Union[str, Callable],
+        timeout: Optional[float] = None,
+        args: Tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        return ray.get(self.collective_rpc_async(method, timeout, args, kwargs))
 
     def check_health(self):
         return
 
+# one ZMQ context per process: every Context spawns its own I/O threads, so
+# executors share a lazily created one (VERL_ZMQ_IO_THREADS tunes the count)
+# together with a pool of preconnected REQ sockets keyed by worker address
+_ZMQ_CONTEXT: Optional[zmq.Context] = None
+_ZMQ_SOCKET_POOL: Dict[str, zmq.Socket] = {}
+
+
+def _get_zmq_context() -> zmq.Context:
+    global _ZMQ_CONTEXT
+    if _ZMQ_CONTEXT is None:
+        _ZMQ_CONTEXT = zmq.Context(io_threads=int(os.environ.get("VERL_ZMQ_IO_THREADS", "8")))
+    return _ZMQ_CONTEXT
+
+
+def _get_zmq_socket(address: str) -> zmq.Socket:
+    socket = _ZMQ_SOCKET_POOL.get(address)
+    if socket is None or socket.closed:
+        socket = _get_zmq_context().socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.connect(address)
+        _ZMQ_SOCKET_POOL[address] = socket
+    return socket
+
+
 class ExternalZeroMQDistributedExecutor(Executor):
     """An executor that engines are launched by external ray actors."""
 
@@ -143,12 +206,8 @@ class ExternalZeroMQDistributedExecutor(Executor):
 
     def _init_executor(self) -> None:
         addresses = os.environ["VERL_VLLM_ZMQ_ADDRESSES"].split(",")
-        self.context = zmq.Context()
-        self.sockets = []
-        for address in addresses:
-            socket = self.context.socket(zmq.REQ)
-            socket.connect(address)
-            self.sockets.append(socket)
+        self.context = _get_zmq_context()
+        self.sockets = [_get_zmq_socket(address) for address in addresses]
 
         kwargs = dict(
             vllm_config=self.vllm_config,
@@ -174,14 +233,28 @@ class ExternalZeroMQDistributedExecutor(Executor):
             sent_method = pickle.dumps(method)
         del method
 
-        message = pickle.dumps((sent_method, args, kwargs or {}))
+        # serialize once with out-of-band buffers: large ndarray/tensor args go
+        # out as extra zero-copy message parts instead of being baked into the
+        # pickle stream, and every socket shares the same frames
+        buffers: List[pickle.PickleBuffer] = []
+        message = pickle.dumps((sent_method, args, kwargs or {}), protocol=5, buffer_callback=buffers.append)
+        frames = [message] + [b.raw() for b in buffers]
         for socket in self.sockets:
-            socket.send(message, zmq.DONTWAIT)
+            socket.send_multipart(frames, zmq.DONTWAIT, copy=False)
 
-        outputs = []
+        # REQ/REP is lock-step per socket, but draining replies in arrival
+        # order avoids stalling on the first socket while later ones are ready
+        poller = zmq.Poller()
         for socket in self.sockets:
-            outputs.append(pickle.loads(socket.recv()))
-        return outputs
+            poller.register(socket, zmq.POLLIN)
+        replies = {}
+        while len(replies) < len(self.sockets):
+            for socket, _ in poller.poll():
+                reply_frames = socket.recv_multipart(zmq.DONTWAIT)
+                replies[socket] = pickle.loads(reply_frames[0], buffers=reply_frames[1:])
+                poller.unregister(socket)
+        # keep worker order stable for callers
+        return [replies[socket] for socket in self.sockets]
 
     def check_health(self):
         return
@@ -194,35 +267,54 @@ def process_image(image: Any, max_pixels: int = 2048 * 2048, min_pixels: int = 5
     if isinstance(image, dict):
         image = Image.open(BytesIO(image['bytes']))
 
-    if (image.width * image.height) > max_pixels:
-        resize_factor = math.sqrt(max_pixels / (image.width * image.height))
-        width, height = int(image.width * resize_factor), int(image.height * resize_factor)
-        image = image.resize((width, height), resample=Image.Resampling.NEAREST)
-
-    if (image.width * image.height) < min_pixels:
-        resize_factor = math.sqrt(min_pixels / (image.width * image.height))
-        width, height = int(image.width * resize_factor), int(image.height * resize_factor)
-        image = image.resize((width, height), resample=Image.Resampling.NEAREST)
-
-    if image.width < 28 or image.height < 28:
-        resize_factor = 28 / min(image.width, image.height)
-        width, height = int(image.width * resize_factor + 1), int(image.height * resize_factor + 1)
-        image = image.resize((width, height), resample=Image.Resampling.NEAREST)
-
-    if image.width / image.height >= 200:
-        width, height = image.width, int(image.width / 190 + 1)
-        image = image.resize((width, height), resample=Image.Resampling.NEAREST)
+    # common case: the image is already RGB and inside the allowed envelope,
+    # so none of the constraint arithmetic below can change it
+    width, height = image.width, image.height
+    if (min_pixels <= width * height <= max_pixels and width >= 28 and height >= 28 and
+            width / height < 200 and height / width < 200 and image.mode == 'RGB'):
+        return image
+
+    # resolve the target size from the combined constraints first (same integer
+    # arithmetic as the old cascade of up-to-five sequential resizes), then
+    # resample once; a single bilinear convolution pass moves far fewer bytes
+    # than chained NEAREST passes over intermediate sizes
+    if (width * height) > max_pixels:
+        resize_factor = math.sqrt(max_pixels / (width * height))
+        width, height = int(width * resize_factor), int(height * resize_factor)
+
+    if (width * height) < min_pixels:
+        resize_factor = math.sqrt(min_pixels / (width * height))
+        width, height = int(width * resize_factor), int(height * resize_factor)
+
+    if width < 28 or height < 28:
+        resize_factor = 28 / min(width, height)
+        width, height = int(width * resize_factor + 1), int(height * resize_factor + 1)
+
+    if width / height >= 200:
+        height = int(width / 190 + 1)
+
+    if height / width >= 200:
+        width = int(height / 190 + 1)
+
+    if image.mode in ('P', 'PA'):
+        # palette images must be expanded before convolution resampling
+        image = image.convert('RGB')
 
-    if image.height / image.width >= 200:
-        width, height = int(image.height / 190 + 1), image.height
-        image = image.resize((width, height), resample=Image.Resampling.NEAREST)
+    if (width, height) != (image.width, image.height):
+        image = image.resize((width, height), resample=Image.Resampling.BILINEAR)
 
     if image.mode != 'RGB':
         image = image.convert('RGB')
 
     return image
 
-def compute_reward(reward_fn, gpt_reward_fn, batch, non_tensor_batch, iteration):
+def compute_reward(reward_fn, gpt_reward_fn, tensors, non_tensors, iteration):
+    # the reward fns expect a DataProto; wrap the raw tensor dict here so
+    # callers don't build (and copy) a throwaway TensorDict per request.
+    # DataProto insists on object ndarrays in non_tensor_batch, so the scalar
+    # fields are boxed here (off the event loop) rather than by every caller
+    batch = TensorDict(tensors, batch_size=tensors['prompts'].shape[0])
+    non_tensor_batch = {key: np.array([value], dtype=object) for key, value in non_tensors.items()}
     cur_batch = DataProto(batch=batch, non_tensor_batch=non_tensor_batch)
 
     if gpt_reward_fn:
@@ -292,6 +384,30 @@ class AsyncvLLMEngine:
         self.val_reward_fn = val_reward_fn
         self.val_gpt_reward_fn = val_gpt_reward_fn
 
+        # background writer for trajectory dumps; one worker so appends to the
+        # same traj.jsonl stay ordered
+        self._traj_io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="traj_io")
+        # reward functions run CPU-bound (or judge-API-bound) work; executing
+        # them on the event-loop thread would stall every other rollout
+        # coroutine while one request is being scored
+        self._reward_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="reward")
+        # cap on concurrent generate calls: a huge waiting queue thrashes the
+        # vLLM scheduler, and a bound lets other requests' tool-call and
+        # reward work proceed while the generation slots are full. The
+        # semaphore itself is created lazily on the actor's event loop.
+        self._max_inflight = self.config.rollout.get('max_inflight', 64)
+        self._gen_sem = None
+        # hot-path config values resolved once; OmegaConf walks the config
+        # tree on every attribute or .get access, which adds up per turn
+        self._save_dir = self.config.rollout.save_traj_dir
+        self._save_traj = (self._save_dir is not None) and (self.config.rollout.save_traj == True)
+        self._max_total_response_length = int(self.config.rollout.max_total_response_length)
+        self._max_image_num_train = self.config.rollout.get('limit_mm_per_prompt', {'image': 1})['image']
+        self._max_image_num_val = self.config.rollout.get('val_limit_mm_per_prompt', {'image': 1})['image']
+        self._rollout_n = self.config.rollout.n
+        self._rollout_val_n = self.config.rollout.val_n
+        self._use_relative_coordinates = self.config.rollout.use_relative_coordinates
+
     def init_engine(self):
         """Init vLLM AsyncLLM engine."""
         config = self.config
@@ -321,7 +437,16 @@ class AsyncvLLMEngine:
 
         # print(f"self.config.rollout.stop: {self.config.rollout.stop}, type(self.config.rollout.stop): {type(self.config.rollout.stop)}")
 
-        kwargs['stop'] = list(self.config.rollout.stop)
+        # resolve the OmegaConf stop list once; per-request list(...) plus
+        # interpolation resolution adds up at thousands of rollouts per step
+        self._stop_list = list(self.config.rollout.stop)
+        self._default_sampling_kwargs = {
+            "n": 1,
+            "stop": self._stop_list, #['</grounding>',],
+            "detokenize": True,
+            "include_stop_str_in_output": True,
+        }
+        kwargs['stop'] = self._stop_list
 
         print(f"override_generation_config: {kwargs}")
         self.sampling_params = SamplingParams(**kwargs)
@@ -377,6 +502,25 @@ class AsyncvLLMEngine:
         return vllm_config
 
     def _preprocess_prompt_to_async_rollout_requests(self, prompts: DataProto, n):
+        # the per-prompt PIL decode and HF image_processor calls are CPU-bound,
+        # independent and release the GIL in C code; fan them out on a thread
+        # pool instead of serializing them before the engine can launch
+        original_image_paths = []
+        first_images = []
+        for _multimodal_data in prompts.non_tensor_batch["multi_modal_data"]:
+            assert len(_multimodal_data['image']) == 2, f"multimodal_data should contain the downscaled image and a upscaled resized image, but got len(multi_modal_data['image']): {len(_multimodal_data['image'])}."
+            original_image_paths.append(_multimodal_data['image'].pop(-1))
+            first_images.append(_multimodal_data['image'][0])
+        with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 8)) as pool:
+            original_images = list(pool.map(self.load_image, original_image_paths))
+        # one batched image_processor call prices every first image at once;
+        # its image_grid_thw rows map one-to-one onto the input images
+        if first_images:
+            image_grid_thws = self.processor.image_processor(first_images, return_tensors='pt')['image_grid_thw']
+            image_token_nums = [grid.prod() // self.merge_length for grid in image_grid_thws]
+        else:
+            image_token_nums = []
+
         req_list = []
         for data_idx, _raw_prompt_id in enumerate(prompts.non_tensor_batch["raw_prompt_ids"]):
             _raw_prompt_id = list(_raw_prompt_id)
@@ -390,10 +534,8 @@ class AsyncvLLMEngine:
             _input_ids = prompts.batch['input_ids'][data_idx]
             _attention_mask = prompts.batch['attention_mask'][data_idx]
             _position_ids = prompts.batch['position_ids'][data_idx]
-            assert len(_multimodal_data['image']) == 2, f"multimodal_data should contain the downscaled image and a upscaled resized image, but got len(multi_modal_data['image']): {len(_multimodal_data['image'])}."
-            original_image_path = _multimodal_data['image'].pop(-1)
-            original_image = self.load_image(original_image_path)
-            image_token_num = self.calculate_image_token_num(_multimodal_data['image'][0])
+            original_image = original_images[data_idx]
+            image_token_num = image_token_nums[data_idx]
 
             for idx in range(n):
                 req = AsyncRolloutRequest(
@@ -420,39 +562,82 @@ class AsyncvLLMEngine:
                 )
                 req.original_image=original_image
                 req.image_token_num = image_token_num
+                # grid of the first (prompt) image; the rollout loop extends
+                # this with the tool-call grids so post_process never has to
+                # re-run the image processor just to recover them
+                req.image_grid_thw = image_grid_thws[data_idx]
                 req_list.append(req)
 
         return req_list
 
     def load_image(self, image_path):
         assert os.path.exists(image_path)
-        original_image = Image.open(image_path).convert("RGB")
-        return original_image
+        original_image = Image.open(image_path)
+        # Opt-in JPEG fast decode: draft() lets libjpeg decode at 1/2, 1/4 or
+        # 1/8 scale (up to 64x less decode work) and is a no-op for other
+        # formats. Off by default because this image is the full-resolution
+        # source the zoom tool crops from, so only engage it when a pixel
+        # budget is configured.
+        draft_max_pixels = self.config.rollout.get('draft_decode_max_pixels', None)
+        if draft_max_pixels:
+            width, height = original_image.size
+            if width * height > draft_max_pixels:
+                aspect = width / height
+                original_image.draft('RGB', (int(math.sqrt(draft_max_pixels * aspect)),
+                                             int(math.sqrt(draft_max_pixels / aspect))))
+        return original_image.convert("RGB")
+
+    def calculate_image_grid_thw(self, image):
+        return self.processor.image_processor([image], return_tensors='pt')['image_grid_thw'][0]
 
     def calculate_image_token_num(self, image):
-        image_grid_thws = self.processor.image_processor([image], return_tensors='pt')['image_grid_thw']
-        image_token_num = image_grid_thws[0].prod() // self.merge_length
-        return image_token_num
+        return self.calculate_image_grid_thw(image).prod() // self.merge_length
+
+    @functools.lru_cache(maxsize=128)
+    def _tool_call_prompt_ids(self, action_turn: int) -> tuple:
+        """Token ids of the success-path tool-call scaffold, memoized per turn.
+
+        The scaffold text only varies in the two turn numbers, so each turn
+        index is tokenized once per engine instead of once per tool call.
+        (Splicing pretokenized fragments would be cheaper still, but BPE merges
+        across fragment boundaries can change the ids, so the whole message is
+        encoded and cached instead.)
+        """
+        message = "<|im_end|>\n<|im_start|>user\n" + TOOL_CALL_CROP_MULTI_TRUN_PROMPT.format(
+            action_turn=action_turn, observation_turn=action_turn + 1) + "<|im_end|>\n<|im_start|>assistant\n"
+        return tuple(self.tokenizer.encode(message))
 
     def save_traj_and_obs(self, save_directory, json_dict=None, original_image=None, resize_image=None, turn_idx=-1):
+        """Queue a trajectory/observation dump on the background IO thread.
+
+        The JSONL append and JPEG encodes used to run inline in the rollout
+        path and stalled it on disk; the single-worker pool keeps per-file
+        append order while taking the IO off the critical path.
+        """
+        self._traj_io_pool.submit(self._save_traj_and_obs_sync, save_directory, json_dict, original_image,
+                                  resize_image, turn_idx)
+
+    def _save_traj_and_obs_sync(self, save_directory, json_dict=None, original_image=None, resize_image=None, turn_idx=-1):
         os.makedirs(save_directory, exist_ok=True)
         if json_dict is not None:
             with open(os.path.join(save_directory, "traj.jsonl"), "a+") as f:
                 f.write(json.dumps(json_dict)+"\n")
-        if original_image is not None:
-            if turn_idx == -1:
-                file_name = "original_image.jpg"
-            else:
-                file_name = f"observation_{turn_idx}_original_image.jpg"
-            original_image.save(os.path.join(save_directory, file_name))
+        # observation dumps are debugging artifacts: encode them cheap (lower
+        # quality, chroma subsampling, no progressive scan), and skip the
+        # un-resized observation crop -- the resized copy carries the same
+        # information the trajectory actually saw
+        if original_image is not None and turn_idx == -1:
+            original_image.save(os.path.join(save_directory, "original_image.jpg"), format='JPEG', quality=60,
+                                subsampling=2, progressive=False)
         if resize_image is not None:
             if turn_idx == -1:
                 file_name = "resized_image.jpg"
             else:
                 file_name = f"observation_{turn_idx}_resized_image.jpg"
-            resize_image.save(os.path.join(save_directory, file_name))
+            resize_image.save(os.path.join(save_directory, file_name), format='JPEG', quality=60, subsampling=2,
+                              progressive=False)
 
-    def post_process_single(self, prefix_length, vllm_input, multi_turn_response_mask):
+    def post_process_single(self, prefix_length, vllm_input, multi_turn_response_mask, image_grid_thw_list=None):
 
         # for each traj, we skip first-round prompt_ids/attention_mask
         first_round_prompt_length = prefix_length
@@ -462,69 +647,108 @@ class AsyncvLLMEngine:
         # print(f"len(vllm_input['multi_modal_data']['image']): {len(vllm_input['multi_modal_data']['image'])}, vllm_input['multi_modal_data']['image']: {vllm_input['multi_modal_data']['image']}, len(multi_turn_response_mask): {len(multi_turn_response_mask)}")
 
         if len(vllm_input['multi_modal_data']['image']) > 1:
-            processed_image_inputs = self.processor.image_processor(vllm_input['multi_modal_data']['image'][1:], return_tensors='pt')    # NOTE: The fisrt image is the original image, here we only take the resized image into account
-            image_grid_thws = processed_image_inputs['image_grid_thw']
-        all_response_masks = torch.cat(multi_turn_response_mask[1:], dim=0).tolist()
-        
+            if image_grid_thw_list:
+                # grids were cached when each tool-call image was appended; no
+                # need to re-run the image_processor over the whole trajectory
+                image_grid_thws = torch.stack(image_grid_thw_list, dim=0)
+            else:
+                processed_image_inputs = self.processor.image_processor(vllm_input['multi_modal_data']['image'][1:], return_tensors='pt')    # NOTE: The fisrt image is the original image, here we only take the resized image into account
+                image_grid_thws = processed_image_inputs['image_grid_thw']
+        # the rollout loop records (length, value) spans rather than per-turn
+        # arrays; one allocation plus slice fills replaces a torch.cat (or
+        # np.concatenate) over many small buffers
+        mask_spans = multi_turn_response_mask[1:]
+        all_response_masks = np.empty(sum(length for length, _ in mask_spans), dtype=np.int64)
+        offset = 0
+        for length, value in mask_spans:
+            all_response_masks[offset:offset + length] = value
+            offset += length
+
         assert len(generation_response_ids) == len(all_response_masks)
         # print(f"len(generation_response_ids): {len(generation_response_ids)}, len(all_response_masks): {len(all_response_masks)}")
-        
-        index, image_pad_token, magic_num = 0, 151655, 654321
-        while image_pad_token in generation_response_ids:
-            image_pad_token_pos = generation_response_ids.index(image_pad_token)
-            image_pad_token_repeat_num = image_grid_thws[index].prod() // self.merge_length
-            # update response_tensor_ids
-            generation_response_ids[image_pad_token_pos : image_pad_token_pos + 1] = [magic_num] * image_pad_token_repeat_num
-            # update all_response_masks
-            all_response_masks[image_pad_token_pos : image_pad_token_pos + 1] = [0] * image_pad_token_repeat_num
-            index += 1
-        generation_response_ids = [image_pad_token if x == magic_num else x for x in generation_response_ids]
-        all_response = torch.tensor(generation_response_ids, dtype=torch.int64, device=multi_turn_response_mask[0].device)
-        all_response_masks = torch.tensor(all_response_masks, dtype=torch.int64, device=multi_turn_response_mask[0].device)
+
+        image_pad_token = 151655
+        ids = np.asarray(generation_response_ids, dtype=np.int64)
+        masks = all_response_masks
+        # expand each <|image_pad|> into its per-image token count in one linear
+        # pass; the old while/.index/list-splice loop rescanned and reshifted
+        # the whole list per image (quadratic in tokens)
+        pad_positions = np.flatnonzero(ids == image_pad_token)
+        if pad_positions.size > 0:
+            repeats = np.array([int(image_grid_thws[i].prod()) // self.merge_length for i in range(pad_positions.size)],
+                               dtype=np.int64)
+            out_len = ids.size + int((repeats - 1).sum())
+            out_ids = np.empty(out_len, dtype=np.int64)
+            out_masks = np.empty(out_len, dtype=np.int64)
+            src = dst = 0
+            for pos, repeat in zip(pad_positions, repeats):
+                seg = pos - src
+                out_ids[dst:dst + seg] = ids[src:src + seg]
+                out_masks[dst:dst + seg] = masks[src:src + seg]
+                dst += seg
+                # pad positions are known up front, so the expanded blocks can
+                # carry the pad id directly -- no placeholder value to swap back
+                out_ids[dst:dst + repeat] = image_pad_token
+                out_masks[dst:dst + repeat] = 0
+                dst += repeat
+                src = pos + 1
+            out_ids[dst:] = ids[src:]
+            out_masks[dst:] = masks[src:]
+            ids, masks = out_ids, out_masks
+        # zero-copy wrap of the NumPy buffers; everything downstream (reward
+        # preprocessing, batch assembly) runs on CPU and moves to the target
+        # device once at batch level
+        all_response = torch.from_numpy(ids)
+        all_response_masks = torch.from_numpy(masks)
 
         return all_response, all_response_masks
 
     def preprocess_for_reward_function(self, input_ids, attention_mask, response, response_masks):
 
-        response = [response]
-        response_generation_mask = [response_masks]
-
         # attention_mask:       prompt           response
         #                 [0,0,0,0,1,1,1,1, | 1,1,1,0,0,0,0,0]
-        response = pad_to_max_stack(response, self.pad_token_id, dim=0) # Tensor, (B'*R, padded_length), padded_length is the max length of samples in list
-        response_generation_mask = pad_to_max_stack(response_generation_mask, 0, dim=0) # Tensor, (B'*R, padded_length)
-        assert all([response.size(dim) == response_generation_mask.size(dim) for dim in range(response.ndim)])
-
-        # cut or pad to max length
-        # all should be (B*R, self.config.max_total_response_length)
-        if response.shape[1] > self.config.rollout.max_total_response_length:
-            response = response[:,:self.config.rollout.max_total_response_length]
-            response_generation_mask = response_generation_mask[:,:self.config.rollout.max_total_response_length]
-        elif response.shape[1] < self.config.rollout.max_total_response_length:
-            response = pad_sequence_to_length(response, self.config.rollout.max_total_response_length, self.pad_token_id)
-            response_generation_mask = pad_sequence_to_length(response_generation_mask, self.config.rollout.max_total_response_length, 0)
-        
+        # write straight into (1, max_total_response_length) buffers: the old
+        # pad_to_max_stack + pad_sequence_to_length path allocated and copied
+        # the response three times before it reached its final shape
+        max_response_length = self.config.rollout.max_total_response_length
+        response_length = min(response.size(0), max_response_length)
+        padded_response = torch.full((1, max_response_length), self.pad_token_id, dtype=response.dtype,
+                                     device=response.device)
+        padded_response[0, :response_length].copy_(response[:response_length])
+        response_generation_mask = torch.zeros((1, max_response_length), dtype=response_masks.dtype,
+                                               device=response_masks.device)
+        response_generation_mask[0, :response_length].copy_(response_masks[:response_length])
+        response = padded_response
+
         # FIXME: function get_final_eos_mask cannot handle cases that when there is no <|im_end|> in the given response
         # response_attention_mask = get_final_eos_mask(response_id=response, eos_token=[151645], dtype=attention_mask.dtype) # HACK: for qwen, <|im_end|> is 151645
         # attention_mask: (...,0,0,0,1,1,1), response_attention_mask: (1,1,1,0,0,0,...)
         response_attention_mask = get_final_eos_mask(response_id=response, eos_token=[151645], dtype=attention_mask.dtype) # HACK: for qwen, |im_end| is 151645
         attention_mask = torch.cat((attention_mask, response_attention_mask), dim=-1)
 
-        input_prompt_generation_mask = torch.zeros_like(input_ids, dtype=attention_mask.dtype, device=attention_mask.device) # (B'*R, max_prompt_length), all 0
-        multi_turn_response_mask = torch.cat([input_prompt_generation_mask, response_generation_mask], dim=-1)
+        # final (B, max_prompt_length + max_total_response_length) buffers,
+        # filled by slice copies instead of zeros_like + two torch.cat
+        prompt_length = input_ids.size(1)
+        seq = torch.empty((input_ids.size(0), prompt_length + max_response_length), dtype=input_ids.dtype,
+                          device=input_ids.device)
+        seq[:, :prompt_length].copy_(input_ids)
+        seq[:, prompt_length:].copy_(response)
 
-        seq = torch.cat([input_ids, response], dim=-1) # (B*R, max_prompt_length + max_total_response_length)
+        multi_turn_response_mask = torch.zeros((input_ids.size(0), prompt_length + max_response_length),
+                                               dtype=attention_mask.dtype, device=attention_mask.device)
+        multi_turn_response_mask[:, prompt_length:].copy_(response_generation_mask)
 
         return input_ids, response, seq, attention_mask, multi_turn_response_mask
 
-    def process_tool_call(self, vllm_input, decoded_resp_, observations_list, image_size_used_list, multi_turn_response_mask, current_iteration, save_traj, save_dir, doc_id):
+    def process_tool_call(self, vllm_input, decoded_resp_, observations_list, image_size_used_list, multi_turn_response_mask, current_iteration, save_traj, save_dir, doc_id, image_grid_thw_list=None):
         error_info = None
         try:
-            pattern = ".*<grounding>{\"bbox_2d\": (.*),.*\"source\": [\',\"](.*)[\',\"]}</grounding>"
-            match = re.match(pattern, decoded_resp_, re.DOTALL)
+            match = _GROUNDING_CALL_RE.match(decoded_resp_)
             bbox, source = match.group(1), match.group(2)
-            json_objects = [{"bbox_2d": eval(bbox), "source": source}]
-            tool_type, args = prepare_grounding_inputs_multi_turn(json_objects, observations_list, image_size_used_list, use_relative_coordinates=self.config.rollout.use_relative_coordinates)
+            # the bbox is a JSON list of numbers by construction; json.loads is
+            # much cheaper (and safer) than eval'ing model output
+            json_objects = [{"bbox_2d": json.loads(bbox), "source": source}]
+            tool_type, args = prepare_grounding_inputs_multi_turn(json_objects, observations_list, image_size_used_list, use_relative_coordinates=self._use_relative_coordinates)
         except Exception as e:
             print(str(e))
             error_info = str(e)
@@ -541,10 +765,9 @@ class AsyncvLLMEngine:
                 raise ValueError(f"Unsupported tool type: {tool_type}.")
         
         if isinstance(tool_outputs, Image.Image):
-            # Construct Next Round Prompt
-            tool_call_prompt_message = "<|im_end|>\n<|im_start|>user\n" + TOOL_CALL_CROP_MULTI_TRUN_PROMPT.format(action_turn=current_iteration, observation_turn=current_iteration+1) + "<|im_end|>\n<|im_start|>assistant\n"
-            
-            next_turn_prompt_ids = self.tokenizer.encode(tool_call_prompt_message)
+            # Construct Next Round Prompt; the memoized scaffold stays a tuple,
+            # list += extends from it in place without materializing a copy
+            next_turn_prompt_ids = self._tool_call_prompt_ids(current_iteration)
             # update conversation
             vllm_input['prompt_token_ids'] += next_turn_prompt_ids # this might go over response length, but we will cut it later by 'max_total_response_length'
 
@@ -556,9 +779,14 @@ class AsyncvLLMEngine:
             image_size_used_list.append(resized_image.size)
 
             vllm_input['multi_modal_data']['image'].append(resized_image)
-            multi_turn_response_mask.append(torch.zeros(len(next_turn_prompt_ids), dtype=multi_turn_response_mask[-1].dtype, device=multi_turn_response_mask[-1].device)) # USER, Mark as 0
-
-            image_token_num = self.calculate_image_token_num(resized_image)
+            multi_turn_response_mask.append((len(next_turn_prompt_ids), 0)) # USER, Mark as 0
+
+            # run the image_processor once: the grid both prices the context and
+            # is cached so post_process_single can skip reprocessing the images
+            image_grid_thw = self.calculate_image_grid_thw(resized_image)
+            if image_grid_thw_list is not None:
+                image_grid_thw_list.append(image_grid_thw)
+            image_token_num = image_grid_thw.prod() // self.merge_length
             new_context_length = len(next_turn_prompt_ids) + image_token_num - 1
 
             # print(f"e2: doc_id: {doc_id}, current_iteration: {current_iteration}, context_length: {context_length}, image_size_used_list: {image_size_used_list}, self.max_pixels: {self.max_pixels}, self.min_pixels: {self.min_pixels}")
@@ -567,7 +795,7 @@ class AsyncvLLMEngine:
             tool_call_prompt_message = "<|im_end|>\n<|im_start|>user\n" + tool_outputs + ERROR_INFO_MULTI_TURN_PROMPT + "<|im_end|>\n<|im_start|>assistant\n"
             next_turn_prompt_ids = self.tokenizer.encode(tool_call_prompt_message)
             vllm_input['prompt_token_ids'] += next_turn_prompt_ids # this might go over response length, but we will cut it later by 'max_total_response_length'
-            multi_turn_response_mask.append(torch.zeros(len(next_turn_prompt_ids), dtype=multi_turn_response_mask[-1].dtype, device=multi_turn_response_mask[-1].device)) # USER, Mark as 0
+            multi_turn_response_mask.append((len(next_turn_prompt_ids), 0)) # USER, Mark as 0
 
             new_context_length = len(next_turn_prompt_ids)
 
@@ -585,18 +813,16 @@ class AsyncvLLMEngine:
         self, req: AsyncRolloutRequest, do_sample: bool = True, is_validate: bool = False, **kwargs
     ) -> AsyncRolloutRequest:
         loop = asyncio.get_running_loop()
-        _req = await loop.run_in_executor(None, lambda: deepcopy(req))
-        #_req = deepcopy(req)
+        if self._gen_sem is None:
+            self._gen_sem = asyncio.Semaphore(self._max_inflight)
+        # fork only the containers this coroutine mutates; deepcopy-ing the
+        # request duplicated every PIL image buffer and needed a thread hop
+        _req = req.shallow_fork()
         finish_reason_type = None
         output = None
         current_turns = 0
 
-        kwargs = {
-            "n": 1,
-            "stop": list(self.config.rollout.stop), #['</grounding>',],
-            "detokenize": True,
-            "include_stop_str_in_output": True,
-        }
+        kwargs = dict(self._default_sampling_kwargs)
         if not do_sample:
             kwargs.update({
                 "best_of": 1,
@@ -623,17 +849,21 @@ class AsyncvLLMEngine:
         ground_truth = _req.ground_truth
         data_source = _req.data_source
         image_size_used_list = [_req.image_size_used,]
+        image_grid_thw_list = []  # grid of every tool-call image, filled by process_tool_call
 
         input_ids = torch.tensor(_req.input_ids).unsqueeze(0)
         attention_mask = torch.tensor(_req.attention_mask).unsqueeze(0)
         position_ids = torch.tensor(_req.position_ids).unsqueeze(0)
 
-        multi_turn_response_mask = [torch.zeros(prefix_length, dtype=attention_mask.dtype, device=attention_mask.device)]
+        # per-turn masks are constant runs of 0/1, so track (length, value)
+        # spans only; post_process_single materializes the mask with a single
+        # pre-sized allocation instead of concatenating many small arrays
+        multi_turn_response_mask = [(prefix_length, 0)]
 
-        save_dir = self.config.rollout.save_traj_dir
-        save_traj = (save_dir is not None) and (self.config.rollout.save_traj == True)
+        save_dir = self._save_dir
+        save_traj = self._save_traj
 
-        n = self.config.rollout.val_n if is_validate else self.config.rollout.n  # TODO: for validate, do_sample=False
+        n = self._rollout_val_n if is_validate else self._rollout_n  # TODO: for validate, do_sample=False
         doc_id = doc_id if n == 1 else f"{doc_id}_{_req.rollout_offset}"
 
         if save_traj:
@@ -647,55 +877,72 @@ class AsyncvLLMEngine:
         
         if is_validate and self.val_max_generation_round != 1:
             max_iterations = self.val_max_generation_round
-            max_image_num = self.config.rollout.get('val_limit_mm_per_prompt', {'image': 1})['image']
+            max_image_num = self._max_image_num_val
         else:
             max_iterations = self.max_generation_round
-            max_image_num = self.config.rollout.get('limit_mm_per_prompt', {'image': 1})['image']
+            max_image_num = self._max_image_num_train
         
         # print(f"max_iterations: {max_iterations}, max_image_num: {max_image_num}")
 
-        grounding_pattern = re.compile(r'<grounding>(.*?)</grounding>', re.DOTALL)
+        # kwargs are fixed for the whole conversation, so clone and override the
+        # shared sampling params once instead of deepcopy-ing them every turn
+        sampling_params = deepcopy(self.sampling_params)
+        for key, value in kwargs.items():
+            if hasattr(sampling_params, key):
+                setattr(sampling_params, key, value)
+        # generation already halts at the grounding stop string, so nothing is
+        # gained from streaming partial outputs; FINAL_ONLY wakes this
+        # coroutine once per turn instead of once per generated token, leaving
+        # the event loop free for other requests' tool-call processing
+        sampling_params.output_kind = RequestOutputKind.FINAL_ONLY
+
         current_iteration = 0
         exceed = False
         void = False
+        response_tokens_total = 0
         while current_iteration < max_iterations:
             # with self.update_sampling_params(**kwargs):
 
-            sampling_params = deepcopy(self.sampling_params)
-            for key, value in kwargs.items():
-                if hasattr(sampling_params, key):
-                    setattr(sampling_params, key, value)
-                    
             # print("current_iteration: ", current_iteration, " sampling_params: ", sampling_params)
 
-            outputs = self.engine.generate(
-                prompt=vllm_input,  # because we have already convert it to prompt token id
-                sampling_params=sampling_params,
-                request_id=_req.request_id+str(current_iteration),
-            )
+            async with self._gen_sem:
+                outputs = self.engine.generate(
+                    prompt=vllm_input,  # because we have already convert it to prompt token id
+                    sampling_params=sampling_params,
+                    request_id=_req.request_id+str(current_iteration),
+                )
 
-            async for res in outputs:
-                results = res
+                async for res in outputs:
+                    results = res
 
             content = results.outputs[0].text
 
             _token_ids = results.outputs[0].token_ids
-            filtered_token_ids = [token_id for token_id in _token_ids if token_id <= 151664]
-            # if 151645 not in filtered_token_ids:
-            #     filtered_token_ids = filtered_token_ids + [151645,]
-            response_ = filtered_token_ids
+            # drop ids above the text vocab boundary with a vectorized mask;
+            # the per-token Python comparison loop dominates on long responses
+            _token_arr = np.fromiter(_token_ids, dtype=np.int32, count=len(_token_ids))
+            response_ = _token_arr[_token_arr <= 151664].tolist()
+            # if 151645 not in response_:
+            #     response_ = response_ + [151645,]
 
             # print("content: ", content, "response_: ", response_)
             # exit()
 
             vllm_input['prompt_token_ids'] += response_
-            multi_turn_response_mask.append(torch.ones(len(response_), dtype=attention_mask.dtype, device=attention_mask.device)) # ASSISTANT, Mark as 1
+            multi_turn_response_mask.append((len(response_), 1)) # ASSISTANT, Mark as 1
             context_length += len(response_)
+            response_tokens_total += len(response_)
 
             # print(f"e1: doc_id: {doc_id}, current_iteration: {current_iteration}, context_length: {context_length}")
 
-            decoded_resp_ = self.tokenizer.decode(response_, skip_special_tokens=True)
-            tool_call_contents = grounding_pattern.findall(decoded_resp_)
+            # the engine already detokenized this turn (detokenize=True, with
+            # skip_special_tokens on by default); a second tokenizer.decode is
+            # only needed when the vocab-boundary filter actually dropped ids
+            if len(response_) == len(_token_ids):
+                decoded_resp_ = content
+            else:
+                decoded_resp_ = self.tokenizer.decode(response_, skip_special_tokens=True)
+            tool_call_contents = _GROUNDING_SPAN_RE.findall(decoded_resp_)
             if save_traj:
                 json_line = {"turn_idx": current_iteration, "text_output": decoded_resp_}
                 self.save_traj_and_obs(os.path.join(save_dir, doc_id), json_line)
@@ -705,21 +952,26 @@ class AsyncvLLMEngine:
                     exceed = True
                     break
 
-                if context_length >= self.config.rollout.max_total_response_length - 2000:
+                if context_length >= self._max_total_response_length - 2000:
                     exceed = True
                     break
 
-                old_prompt_token_ids = deepcopy(vllm_input['prompt_token_ids'])
+                # NOTE: prompt_token_ids stays a plain list of ints -- vllm v1
+                # msgpack-serializes it per generate call, so an array.array /
+                # ndarray buffer would be converted back every turn. Rollback
+                # only needs the old length, not a full copy of the ids.
+                old_prompt_token_num = len(vllm_input['prompt_token_ids'])
 
-                new_context_length, tool_outputs = await loop.run_in_executor(None, lambda: self.process_tool_call(vllm_input, decoded_resp_, observations_list, image_size_used_list, multi_turn_response_mask, current_iteration, save_traj, save_dir, doc_id))
+                new_context_length, tool_outputs = await loop.run_in_executor(None, lambda: self.process_tool_call(vllm_input, decoded_resp_, observations_list, image_size_used_list, multi_turn_response_mask, current_iteration, save_traj, save_dir, doc_id, image_grid_thw_list))
                 context_length += new_context_length
 
-                if context_length >= self.config.rollout.max_total_response_length - 2000:
-                    vllm_input['prompt_token_ids'] = old_prompt_token_ids
+                if context_length >= self._max_total_response_length - 2000:
+                    del vllm_input['prompt_token_ids'][old_prompt_token_num:]
                     if isinstance(tool_outputs, Image.Image):
                         vllm_input['multi_modal_data']['image'].pop()
                         image_size_used_list.pop()
                         observations_list.pop()
+                        image_grid_thw_list.pop()
                     multi_turn_response_mask.pop()
                     exceed = True
                     break
@@ -727,7 +979,11 @@ class AsyncvLLMEngine:
             else:
                 finish_reason = results.outputs[0].finish_reason
                 finish_reason_type = FinishReasonTypeEnum.from_str(finish_reason)
-                if finish_reason_type == FinishReasonTypeEnum.LENGTH or (re.match(".*<answer>.*</answer>$", decoded_resp_, re.DOTALL) is None):
+                # same predicate as the old .*<answer>.*</answer>$ regex: the
+                # two tags cannot overlap, so containment plus the suffix test
+                # is exact -- two C-level scans instead of NFA matching
+                has_final_answer = ('<answer>' in decoded_resp_) and decoded_resp_.endswith('</answer>')
+                if finish_reason_type == FinishReasonTypeEnum.LENGTH or not has_final_answer:
                     void = True
                 break
             
@@ -742,41 +998,40 @@ class AsyncvLLMEngine:
         # import time
         # time.sleep(10000)
 
-        avg_response_tokens_per_turn = torch.cat(multi_turn_response_mask, dim=0).sum(-1).item() / (current_iteration + 1)
+        # the prefix and tool-call masks are all zeros, so the running count of
+        # assistant tokens kept during the loop is the full mask sum
+        avg_response_tokens_per_turn = float(response_tokens_total) / (current_iteration + 1)
 
-        all_response, all_response_masks = self.post_process_single(prefix_length, vllm_input, multi_turn_response_mask)
+        all_response, all_response_masks = self.post_process_single(prefix_length, vllm_input, multi_turn_response_mask, image_grid_thw_list)
 
         input_ids, response, seq, attention_mask, multi_turn_response_mask = self.preprocess_for_reward_function(input_ids, attention_mask, all_response, all_response_masks)
 
-        batch_cur = TensorDict(
-            {
-                'prompts': input_ids.contiguous(),
-                'responses': response.contiguous(),
-                'input_ids': seq.contiguous(),  # here input_ids become the whole sentences
-                # 'old_log_probs': log_probs, # we will recompute old log prob with actor
-                'attention_mask': attention_mask.contiguous(),
-                'multi_turn_response_mask': multi_turn_response_mask.contiguous()
-            },
-            batch_size=1
-        )
+        # freshly written CPU tensors -- already contiguous, no copies needed;
+        # compute_reward wraps them into the DataProto the reward fns expect
+        tensors_cur = {
+            'prompts': input_ids,
+            'responses': response,
+            'input_ids': seq,  # here input_ids become the whole sentences
+            # 'old_log_probs': log_probs, # we will recompute old log prob with actor
+            'attention_mask': attention_mask,
+            'multi_turn_response_mask': multi_turn_response_mask,
+        }
 
-        data_source_cur = np.array([data_source], dtype=object)
-        ground_truth_cur = np.array([ground_truth], dtype=object)
-        raw_prompt_cur = np.array([raw_prompt], dtype=object)
-        uid_list_cur = np.array([uid], dtype=object)
         non_tensor_batch_cur = {
-            'data_source': data_source_cur,
-            'ground_truth': ground_truth_cur,
-            'raw_prompt': raw_prompt_cur,
-            'uid': uid_list_cur,
+            'data_source': data_source,
+            'ground_truth': ground_truth,
+            'raw_prompt': raw_prompt,
+            'uid': uid,
         }
 
+        # score on the reward pool so other rollout coroutines keep generating
+        # while this request is being evaluated
         if is_validate:
-            reward_tensor_cur, acc_reward_tensor_cur, format_reward_tensor_cur, overlong_reward_tensor_cur, invalid_uids_cur = compute_reward(self.val_reward_fn, self.val_gpt_reward_fn, batch_cur.to('cpu'), non_tensor_batch_cur, current_iteration)
-            # future = compute_reward.remote(self.val_reward_fn, self.val_gpt_reward_fn, batch_cur.to('cpu'), non_tensor_batch_cur, current_iteration)
+            reward_tensor_cur, acc_reward_tensor_cur, format_reward_tensor_cur, overlong_reward_tensor_cur, invalid_uids_cur = await loop.run_in_executor(
+                self._reward_pool, compute_reward, self.val_reward_fn, self.val_gpt_reward_fn, tensors_cur, non_tensor_batch_cur, current_iteration)
         else:
-            reward_tensor_cur, acc_reward_tensor_cur, format_reward_tensor_cur, overlong_reward_tensor_cur, invalid_uids_cur = compute_reward(self.reward_fn, self.gpt_reward_fn, batch_cur.to('cpu'), non_tensor_batch_cur, current_iteration)
-            # future = compute_reward.remote(self.reward_fn, self.gpt_reward_fn, batch_cur.to('cpu'), non_tensor_batch_cur, current_iteration)
+            reward_tensor_cur, acc_reward_tensor_cur, format_reward_tensor_cur, overlong_reward_tensor_cur, invalid_uids_cur = await loop.run_in_executor(
+                self._reward_pool, compute_reward, self.reward_fn, self.gpt_reward_fn, tensors_cur, non_tensor_batch_cur, current_iteration)
 
         # reward_tensor_cur = torch.from_numpy(reward_tensor_cur).to(device=input_ids.device)
         # acc_reward_tensor_cur = torch.from_numpy(acc_reward_tensor_cur).to(device=input_ids.device)
@@ -788,10 +1043,16 @@ class AsyncvLLMEngine:
         _req.all_response_ids = all_response
         _req.all_response_masks = all_response_masks
         _req.multi_modal_data = vllm_input['multi_modal_data']
-        _req.reward_tensor = reward_tensor_cur.tolist()
-        _req.acc_reward_tensor = acc_reward_tensor_cur.tolist()
-        _req.format_reward_tensor = format_reward_tensor_cur.tolist()
-        _req.overlong_reward_tensor = overlong_reward_tensor_cur.tolist()
+        # one grid per entry of multi_modal_data['image'], all computed during
+        # rollout; post_process reads these for RoPE instead of reprocessing
+        _req.image_grid_thw_list = [_req.image_grid_thw] + image_grid_thw_list
+        # keep the (1, R) numpy rows compute_reward returned; post_process
+        # copies them straight into its staging arrays, so a round-trip
+        # through Python lists only costs conversions on both ends
+        _req.reward_tensor = reward_tensor_cur
+        _req.acc_reward_tensor = acc_reward_tensor_cur
+        _req.format_reward_tensor = format_reward_tensor_cur
+        _req.overlong_reward_tensor = overlong_reward_tensor_cur
         _req.invalid_uids = invalid_uids_cur
         _req.exceed = exceed
         _req.avg_response_tokens_per_turn = avg_response_tokens_per_turn
@@ -829,9 +1090,26 @@ class AsyncvLLMEngine:
         )
         t0 = time.time()
         with torch.no_grad():
-            output_req_list = await asyncio.gather(
-                *[self._async_rollout_a_request(req, do_sample, is_validate, **kwargs) for req in req_list]
-            )
+            # this actor owns a single AsyncLLM replica (dp replicas are
+            # separate ray actors), so work-stealing happens over a shared
+            # queue: a bounded pool of consumer tasks pulls requests as they
+            # free up, which keeps the engine fed without gather() scheduling
+            # every coroutine of the batch at once
+            request_queue: asyncio.Queue = asyncio.Queue()
+            for req in req_list:
+                request_queue.put_nowait(req)
+            num_consumers = min(len(req_list), self.config.rollout.get('rollout_concurrency', 128))
+            output_req_list = []
+
+            async def _consume():
+                while True:
+                    try:
+                        req = request_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    output_req_list.append(await self._async_rollout_a_request(req, do_sample, is_validate, **kwargs))
+
+            await asyncio.gather(*[_consume() for _ in range(num_consumers)])
         t1 = time.time()
         print(f"time: {t1-t0}")
         sorted_output_req_list = sorted(output_req_list, key=lambda x: (x.batch_data_id, x.rollout_offset))
@@ -846,57 +1124,74 @@ class AsyncvLLMEngine:
         tgt_device = prompts.batch["input_ids"].device
 
         # convert to DataProto
+        # fill preallocated per-field containers in a single pass over the
+        # requests; list appends plus a trailing np.array(...) per field walked
+        # the batch twice per field
+        num_reqs = len(output_req_list)
         response = []
         response_generation_mask =[]
-        multi_modal_data_list = []
-        raw_prompts = []
-        uid_list = []
-        data_source_list = []
-        ground_truth_list = []
-        exceed_list = []
-        avg_response_tokens_per_turn_list = []
-        round_num_list = []
-        void_list = []
-
-        reward_tensor_list = []
-        acc_reward_tensor_list = []
-        format_reward_tensor_list = []
-        overlong_reward_tensor_list = []
+        multi_modal_data_list = np.empty(num_reqs, dtype=object)
+        raw_prompts = np.empty(num_reqs, dtype=object)
+        uid_list = np.empty(num_reqs, dtype=object)
+        data_source_list = np.empty(num_reqs, dtype=object)
+        ground_truth_list = np.empty(num_reqs, dtype=object)
+        exceed_list = np.empty(num_reqs, dtype=np.bool_)
+        avg_response_tokens_per_turn_list = np.empty(num_reqs, dtype=object)
+        round_num_list = np.empty(num_reqs, dtype=object)
+        void_list = np.empty(num_reqs, dtype=np.bool_)
+
+        # stage rewards contiguously on the host and ship each kind with one
+        # device copy; writing rows straight into device tensors issued a tiny
+        # blocking transfer per request per kind
+        reward_len = len(output_req_list[0].reward_tensor[0])
+        reward_stage = np.empty((num_reqs, reward_len), dtype=np.float32)
+        acc_reward_stage = np.empty((num_reqs, reward_len), dtype=np.float32)
+        format_reward_stage = np.empty((num_reqs, reward_len), dtype=np.float32)
+        overlong_reward_stage = np.empty((num_reqs, reward_len), dtype=np.float32)
         invalid_uids = []
-        
-        for req in output_req_list:
+        image_grid_thw_per_req = []
+
+        for i, req in enumerate(output_req_list):
             response.append(req.all_response_ids)
             response_generation_mask.append(req.all_response_masks) # at least we have single-turn conversation
-            multi_modal_data_list.append(req.multi_modal_data)
-            raw_prompts.append(req.raw_prompt)
-            uid_list.append(req.uid)
-            data_source_list.append(req.data_source)
-            ground_truth_list.append(req.ground_truth)
-            exceed_list.append(req.exceed)
-            avg_response_tokens_per_turn_list.append(req.avg_response_tokens_per_turn)
-            round_num_list.append(req.round_num)
-            void_list.append(req.void)
-            
-            reward_tensor_list.append(torch.tensor(req.reward_tensor, dtype=torch.float, device=tgt_device))
-            acc_reward_tensor_list.append(torch.tensor(req.acc_reward_tensor, dtype=torch.float, device=tgt_device))
-            format_reward_tensor_list.append(torch.tensor(req.format_reward_tensor, dtype=torch.float, device=tgt_device))
-            overlong_reward_tensor_list.append(torch.tensor(req.overlong_reward_tensor, dtype=torch.float, device=tgt_device))
+            multi_modal_data_list[i] = req.multi_modal_data
+            raw_prompts[i] = req.raw_prompt
+            uid_list[i] = req.uid
+            data_source_list[i] = req.data_source
+            ground_truth_list[i] = req.ground_truth
+            exceed_list[i] = req.exceed
+            avg_response_tokens_per_turn_list[i] = req.avg_response_tokens_per_turn
+            round_num_list[i] = req.round_num
+            void_list[i] = req.void
+
+            reward_stage[i] = req.reward_tensor[0]
+            acc_reward_stage[i] = req.acc_reward_tensor[0]
+            format_reward_stage[i] = req.format_reward_tensor[0]
+            overlong_reward_stage[i] = req.overlong_reward_tensor[0]
             invalid_uids.extend(req.invalid_uids)
+            image_grid_thw_per_req.append(req.image_grid_thw_list)
+
+        reward_tensor = torch.from_numpy(reward_stage).to(tgt_device, non_blocking=True)
+        acc_reward_tensor = torch.from_numpy(acc_reward_stage).to(tgt_device, non_blocking=True)
+        format_reward_tensor = torch.from_numpy(format_reward_stage).to(tgt_device, non_blocking=True)
+        overlong_reward_tensor = torch.from_numpy(overlong_reward_stage).to(tgt_device, non_blocking=True)
         
         # attention_mask:       prompt           response
         #                 [0,0,0,0,1,1,1,1, | 1,1,1,0,0,0,0,0]
-        response = pad_to_max_stack(response, self.pad_token_id, dim=0) # Tensor, (B'*R, padded_length), padded_length is the max length of samples in list
-        response_generation_mask = pad_to_max_stack(response_generation_mask, 0, dim=0) # Tensor, (B'*R, padded_length)
-        assert all([response.size(dim) == response_generation_mask.size(dim) for dim in range(response.ndim)])
-
-        # cut or pad to max length
-        # all should be (B*R, self.config.max_total_response_length)
-        if response.shape[1] > config.max_total_response_length:
-            response = response[:,:config.max_total_response_length]
-            response_generation_mask = response_generation_mask[:,:config.max_total_response_length]
-        elif response.shape[1] < config.max_total_response_length:
-            response = pad_sequence_to_length(response, config.max_total_response_length, self.pad_token_id)
-            response_generation_mask = pad_sequence_to_length(response_generation_mask, config.max_total_response_length, 0)
+        # all should be (B*R, self.config.max_total_response_length): write
+        # each trajectory straight into full-width buffers, clipped to the max
+        # length -- one allocation and one copy per field instead of a
+        # pad-to-batch-max stack followed by a second pad or truncate
+        max_resp_len = config.max_total_response_length
+        response_buf = torch.full((num_reqs, max_resp_len), self.pad_token_id, dtype=response[0].dtype)
+        response_mask_buf = torch.zeros((num_reqs, max_resp_len), dtype=response_generation_mask[0].dtype)
+        for i, (resp, resp_mask) in enumerate(zip(response, response_generation_mask)):
+            assert resp.shape[0] == resp_mask.shape[0]
+            valid_len = min(resp.shape[0], max_resp_len)
+            response_buf[i, :valid_len] = resp[:valid_len]
+            response_mask_buf[i, :valid_len] = resp_mask[:valid_len]
+        response = response_buf
+        response_generation_mask = response_mask_buf
 
         prompt_ids = prompts.batch["input_ids"]
         attention_mask = prompts.batch['attention_mask']  # (bs*tp, max_prompt_length), left padding 0
@@ -919,34 +1214,43 @@ class AsyncvLLMEngine:
 
         attention_mask = torch.cat((attention_mask, response_attention_mask), dim=-1)
 
-        input_prompt_generation_mask = torch.zeros_like(prompt_ids, dtype=attention_mask.dtype, device=attention_mask.device) # (B'*R, max_prompt_length), all 0
-        multi_turn_response_mask = torch.cat([input_prompt_generation_mask, response_generation_mask], dim=-1)
+        # prompt positions are constant zeros: write the response mask into one
+        # zeroed full-width buffer instead of allocating an all-zero prompt
+        # mask and concatenating (which allocates the joint buffer again)
+        prompt_length = prompt_ids.shape[1]
+        multi_turn_response_mask = torch.zeros((prompt_ids.shape[0], prompt_length + response_generation_mask.shape[1]),
+                                               dtype=attention_mask.dtype, device=attention_mask.device)
+        multi_turn_response_mask[:, prompt_length:] = response_generation_mask
 
         seq = torch.cat([prompt_ids, response], dim=-1) # (B*R, max_prompt_length + max_total_response_length)
 
         # NOTE: We repeat 'multi_modal_data'
         non_tensor_batch = {}
-        non_tensor_batch['multi_modal_data'] = np.array(multi_modal_data_list)
-        non_tensor_batch['raw_prompt'] = np.array(raw_prompts, dtype=object)
-        non_tensor_batch['uid'] = np.array(uid_list, dtype=object)
-        non_tensor_batch['data_source'] = np.array(data_source_list, dtype=object)
-        non_tensor_batch['ground_truth'] = np.array(ground_truth_list, dtype=object)
-        non_tensor_batch['avg_response_tokens_per_turn'] = np.array(avg_response_tokens_per_turn_list, dtype=object)
-        non_tensor_batch['rounds_nums'] = np.array(round_num_list, dtype=object)
+        non_tensor_batch['multi_modal_data'] = multi_modal_data_list
+        non_tensor_batch['raw_prompt'] = raw_prompts
+        non_tensor_batch['uid'] = uid_list
+        non_tensor_batch['data_source'] = data_source_list
+        non_tensor_batch['ground_truth'] = ground_truth_list
+        non_tensor_batch['avg_response_tokens_per_turn'] = avg_response_tokens_per_turn_list
+        non_tensor_batch['rounds_nums'] = round_num_list
 
         response_length = response.size(1)
         if position_ids.dim() == 3:  # qwen2vl mrope
-            position_ids_list = []
-            for prompt_with_response, attn_mask, multi_modal_data in zip(seq, attention_mask, multi_modal_data_list):
-                image_inputs = self.processor.image_processor(multi_modal_data['image'], return_tensors='pt')
-                image_grid_thw = image_inputs['image_grid_thw']
-                pos_ids = get_rope_index(
+            # grids were recorded as the images were added during rollout, so
+            # RoPE only needs a stack here -- no image preprocessing pass.
+            # get_rope_index is per-sample CPU torch work that releases the
+            # GIL; executor.map fans the batch out while preserving order
+            def _rope_for_sample(args):
+                prompt_with_response, attn_mask, grid_list = args
+                return get_rope_index(
                     self.processor,
                     input_ids=prompt_with_response,
-                    image_grid_thw=image_grid_thw,
+                    image_grid_thw=torch.stack(grid_list, dim=0),
                     attention_mask=attn_mask,
                 )
-                position_ids_list.append(pos_ids)
+
+            with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 8)) as pool:
+                position_ids_list = list(pool.map(_rope_for_sample, zip(seq, attention_mask, image_grid_thw_per_req)))
             position_ids = torch.stack(position_ids_list, dim=0)
         else:
             delta_position_id = torch.arange(1, response_length + 1, device=position_ids.device)
@@ -958,13 +1262,8 @@ class AsyncvLLMEngine:
             response_position_ids = position_ids[:, -1:] + delta_position_id
             position_ids = torch.cat([position_ids, response_position_ids], dim=-1)
 
-        exceed_mask = torch.tensor(exceed_list, dtype=torch.bool, device=tgt_device)
-        void_mask = torch.tensor(void_list, dtype=torch.bool, device=tgt_device)
-
-        reward_tensor = torch.cat(reward_tensor_list, dim=0)
-        acc_reward_tensor = torch.cat(acc_reward_tensor_list, dim=0)
-        format_reward_tensor = torch.cat(format_reward_tensor_list, dim=0)
-        overlong_reward_tensor = torch.cat(overlong_reward_tensor_list, dim=0)
+        exceed_mask = torch.from_numpy(exceed_list).to(tgt_device)
+        void_mask = torch.from_numpy(void_list).to(tgt_device)
 
         batch_size = prompt_ids.shape[0]
         batch = TensorDict(
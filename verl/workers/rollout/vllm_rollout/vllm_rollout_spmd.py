@@ -679,14 +679,18 @@ class vLLMRollout_MultiTurn_ToolCall(BaseRollout):
                     original_image = self.load_image(original_image_path)
                         
                 for _ in range(n):
-                    # NOTE: use deepcopy to seperate variables
+                    # NOTE: fork only the containers each traj mutates
+                    # (token-id list, image list); raw_prompt_ids is a flat
+                    # list of ints and the PIL images are never edited in
+                    # place, so deepcopy-ing them only duplicated buffers
                     if self.use_raw_image:
                         observations_list.append([original_image, ])
                         raw_prompts.append(raw_prompt)
                         assert len(image_size_used) == 1
                         image_size_used_list.append([image_size_used[0], ])
                     vllm_inputs.append(
-                        {'prompt_token_ids': deepcopy(raw_prompt_ids), 'multi_modal_data': deepcopy(multi_modal_data)} # raw_prompt_ids: list
+                        {'prompt_token_ids': list(raw_prompt_ids),
+                         'multi_modal_data': {k: list(v) if isinstance(v, list) else v for k, v in multi_modal_data.items()}} # raw_prompt_ids: list
                     )
                     multi_turn_response_mask.append(
                         [torch.zeros(prefix_length, dtype=attention_mask.dtype, device=attention_mask.device)], # USER, Mark as 0
@@ -1256,9 +1260,10 @@ class vLLMRollout_MultiTurn_ResizeImage(BaseRollout):
             for raw_prompt_ids, multi_modal_data in zip(non_tensor_batch.pop('raw_prompt_ids'), non_tensor_batch.pop('multi_modal_data')):
                 prefix_length = len(raw_prompt_ids)
                 for _ in range(n):
-                    # NOTE: use deepcopy to seperate variables
+                    # NOTE: fork only the containers each traj mutates; see above
                     vllm_inputs.append(
-                        {'prompt_token_ids': deepcopy(raw_prompt_ids), 'multi_modal_data': deepcopy(multi_modal_data)} # raw_prompt_ids: list
+                        {'prompt_token_ids': list(raw_prompt_ids),
+                         'multi_modal_data': {k: list(v) if isinstance(v, list) else v for k, v in multi_modal_data.items()}} # raw_prompt_ids: list
                     )
                     multi_turn_response_mask.append(
                         [torch.zeros(prefix_length, dtype=attention_mask.dtype, device=attention_mask.device)], # USER, Mark as 0
@@ -1535,10 +1540,14 @@ class vLLMAsyncRollout:
 
     def _loop_forever(self):
         while True:
-            message = self.socket.recv()
-            method, args, kwargs = pickle.loads(message)
+            # frame 0 is the pickle stream; any further frames are protocol-5
+            # out-of-band buffers carrying ndarray/tensor payloads zero-copy
+            frames = self.socket.recv_multipart()
+            method, args, kwargs = pickle.loads(frames[0], buffers=frames[1:])
             result = self.execute_method(method, *args, **kwargs)
-            self.socket.send(pickle.dumps(result))
+            buffers = []
+            reply = pickle.dumps(result, protocol=5, buffer_callback=buffers.append)
+            self.socket.send_multipart([reply] + [b.raw() for b in buffers], copy=False)
 
     def get_zeromq_address(self):
         return self.address